@@ -119,6 +119,7 @@ HAYSTACK_CONNECTIONS = {
     'default': {
         'ENGINE': os.environ.get('HAYSTACK_DEFAULT_ENGINE', 'haystack_es.backends.Elasticsearch5SearchEngine'),
         'URL': os.environ.get('HAYSTACK_DEFAULT_URL', 'http://127.0.0.1:9200/'),
+        # Alias of the live index when rebuilt with rebuild_search_index
         'INDEX_NAME': os.environ.get('HAYSTACK_DEFAULT_INDEX_NAME', 'dgs'),
         'INCLUDE_SPELLING': bool(os.environ.get('HAYSTACK_DEFAULT_INCLUDE_SPELLING', True)),
         'KWARGS': {},
@@ -142,12 +143,33 @@ if haystack_default_connection_class:
     HAYSTACK_CONNECTIONS['default']['KWARGS']['connection_class'] = haystack_default_connection_class
 
 HAYSTACK_SIGNAL_PROCESSOR = os.environ.get('HAYSTACK_SIGNAL_PROCESSOR',
-                                           'celery_haystack.signals.CelerySignalProcessor')
+                                           'goals_search.signals.CoalescingSignalProcessor')
 
 HAYSTACK_DEFAULT_OPERATOR = os.environ.get('HAYSTACK_DEFAULT_OPERATOR', 'AND')
 
 HAYSTACK_SEARCH_RESULTS_PER_PAGE = int(os.environ.get('HAYSTACK_SEARCH_RESULTS_PER_PAGE', 30))
 
+GOALS_SEARCH_BULK_CHUNK_SIZE = int(os.environ.get('GOALS_SEARCH_BULK_CHUNK_SIZE', 500))
+
+GOALS_SEARCH_BULK_THREAD_COUNT = int(os.environ.get('GOALS_SEARCH_BULK_THREAD_COUNT', 4))
+
+GOALS_SEARCH_INDEX_GRACE_PERIOD = int(os.environ.get('GOALS_SEARCH_INDEX_GRACE_PERIOD', 3600))
+
+GOALS_SEARCH_CACHE_TIMEOUT = int(os.environ.get('GOALS_SEARCH_CACHE_TIMEOUT', 5 * 60))
+
+GOALS_SEARCH_FACET_CACHE_TIMEOUT = int(os.environ.get('GOALS_SEARCH_FACET_CACHE_TIMEOUT', 60 * 60))
+
+# Either 'elasticsearch' or 'postgres'
+GOALS_SEARCH_BACKEND = os.environ.get('GOALS_SEARCH_BACKEND', 'elasticsearch')
+
+# PostgreSQL text search configuration of each language, e.g. en:english;sw:simple
+GOALS_SEARCH_TEXT_CONFIGS = {'en': 'english'}
+
+if os.environ.get('GOALS_SEARCH_TEXT_CONFIGS', ''):
+    GOALS_SEARCH_TEXT_CONFIGS = dict(
+        [i.strip() for i in config.split(':')]
+        for config in os.environ.get('GOALS_SEARCH_TEXT_CONFIGS', '').split(';'))
+
 # Cache
 
 CACHES = {
@@ -161,6 +183,32 @@ CACHES = {
     }
 }
 
+# Goals
+
+GOALS_ROLLUP_CACHE_TIMEOUT = int(os.environ.get('GOALS_ROLLUP_CACHE_TIMEOUT', 60 * 60))
+
+GOALS_PROGRESS_PREVIEW_CACHE_TIMEOUT = int(os.environ.get('GOALS_PROGRESS_PREVIEW_CACHE_TIMEOUT', 24 * 60 * 60))
+
+GOALS_API_CACHE_TIMEOUT = int(os.environ.get('GOALS_API_CACHE_TIMEOUT', 5 * 60))
+
+GOALS_API_COUNT_CACHE_TIMEOUT = int(os.environ.get('GOALS_API_COUNT_CACHE_TIMEOUT', 60))
+
+GOALS_API_DEFAULT_COUNT = os.environ.get('GOALS_API_DEFAULT_COUNT', 'exact')
+
+GOALS_API_EXPORT_CHUNK_SIZE = int(os.environ.get('GOALS_API_EXPORT_CHUNK_SIZE', 2000))
+
+GOALS_PROGRESS_BULK_MAX_RECORDS = int(os.environ.get('GOALS_PROGRESS_BULK_MAX_RECORDS', 10000))
+
+GOALS_SERIES_CACHE_TIMEOUT = int(os.environ.get('GOALS_SERIES_CACHE_TIMEOUT', 24 * 60 * 60))
+
+GOALS_SERIES_MAX_AREAS = int(os.environ.get('GOALS_SERIES_MAX_AREAS', 100))
+
+GOALS_FLAT_PROGRESS_REFRESH_DELAY = int(os.environ.get('GOALS_FLAT_PROGRESS_REFRESH_DELAY', 60))
+
+# Changing the natural key requires a matching unique index on goals_progress
+GOALS_PROGRESS_NATURAL_KEY = os.environ.get(
+    'GOALS_PROGRESS_NATURAL_KEY', 'component area year fiscal_year groups').split()
+
 # Password validation
 # https://docs.djangoproject.com/en/1.11/ref/settings/#auth-password-validators
 
@@ -258,6 +306,11 @@ IMAGEKIT_DEFAULT_CACHEFILE_BACKEND = os.environ.get('IMAGEKIT_DEFAULT_CACHEFILE_
 IMAGEKIT_DEFAULT_CACHEFILE_STRATEGY = os.environ.get('IMAGEKIT_DEFAULT_CACHEFILE_STRATEGY',
                                                      'imagekit.cachefiles.strategies.Optimistic')
 
+# Import export
+
+# Imports run in one transaction, so search index updates are batched on commit
+IMPORT_EXPORT_USE_TRANSACTIONS = str_to_bool(os.environ.get('IMPORT_EXPORT_USE_TRANSACTIONS', 'True'))
+
 # Site
 
 SITE_NAME = os.environ.get('SITE_NAME', 'DGs')
@@ -307,7 +360,7 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.BrowsableAPIRenderer',
         'goals.api.renderers.CSVRenderer',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'goals.api.pagination.KeysetPagination',
     'PAGE_SIZE': 100
 }
 
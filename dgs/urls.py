@@ -47,6 +47,7 @@ router.register(r'targets', goals_views.TargetViewSet)
 router.register(r'indicators', goals_views.IndicatorViewSet, 'indicators')
 router.register(r'components', goals_views.ComponentViewSet)
 router.register(r'progress', goals_views.ProgressViewSet)
+router.register(r'flatprogress', goals_views.FlatProgressViewSet)
 
 if goals_search_installed:
     router.register(r'search', search_views.SearchViewSet, 'search')
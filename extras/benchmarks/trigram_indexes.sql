@@ -0,0 +1,107 @@
+-- Before/after query plans of the icontains filters with and without the
+-- pg_trgm indexes from goals migration 0059.
+--
+-- Generates 50k indicators, 50k components and 1M progress rows inside a
+-- transaction which is rolled back at the end, so it can be run against
+-- a migrated development database:
+--
+--     psql dgs -f extras/benchmarks/trigram_indexes.sql > trigram.txt
+
+\timing on
+BEGIN;
+
+INSERT INTO goals_plan (code, name, caption, description, slug, created, last_modified, extras)
+VALUES ('bench', 'Benchmark plan', '', '', 'bench', now(), now(), '');
+
+INSERT INTO goals_goal (plan_id, code, name, caption, description, slug, created, last_modified, extras)
+SELECT id, 'bench', 'Benchmark goal', '', '', 'bench', now(), now(), ''
+FROM goals_plan WHERE code = 'bench';
+
+INSERT INTO goals_target (goal_id, code, name, description, slug, created, last_modified, extras)
+SELECT g.id, 'bench', 'Benchmark target', 'Benchmark target', 'bench', now(), now(), ''
+FROM goals_goal g JOIN goals_plan p ON p.id = g.plan_id WHERE p.code = 'bench';
+
+INSERT INTO goals_indicator (target_id, name, name_en, code, description, description_en,
+                             slug, created, last_modified, extras, progress_count)
+SELECT t.id, 'Indicator ' || i, 'Indicator ' || i, 'B' || i,
+       d.text, d.text, 'indicator-' || i, now(), now(), '', 0
+FROM goals_target t
+JOIN goals_goal g ON g.id = t.goal_id
+JOIN goals_plan p ON p.id = g.plan_id,
+     generate_series(1, 50000) i,
+     LATERAL (SELECT (ARRAY['Health', 'Education', 'Water', 'Energy', 'Poverty'])[1 + i % 5]
+                     || ' ' || md5(i::text) || ' ' || md5((i * 7)::text) AS text) d
+WHERE p.code = 'bench';
+
+INSERT INTO goals_component (code, name, name_en, description, description_en, value_unit,
+                             stats_available, data_source, data_source_en, agency, slug,
+                             created, last_modified, extras, progress_count)
+SELECT 'BC' || i, d.text, d.text, d.text, d.text, '%', 'YES',
+       'Survey ' || md5((i * 3)::text), 'Survey ' || md5((i * 3)::text), '',
+       'component-' || i, now(), now(), '', 0
+FROM generate_series(1, 50000) i,
+     LATERAL (SELECT (ARRAY['Mortality', 'Enrolment', 'Access', 'Coverage', 'Income'])[1 + i % 5]
+                     || ' ' || md5((i * 5)::text) AS text) d;
+
+INSERT INTO goals_component_indicators (component_id, indicator_id)
+SELECT c.id, ind.id
+FROM goals_component c
+JOIN goals_indicator ind ON ind.code = 'B' || substr(c.code, 3);
+
+INSERT INTO goals_areatype (code, name, description, created, last_modified, extras)
+VALUES ('bench', 'Benchmark', '', now(), now(), '');
+
+INSERT INTO goals_area (code, name, type_id, description, slug, created, last_modified,
+                        extras, lft, rght, tree_id, level)
+SELECT 'bench', 'Benchmark area', id, '', 'bench', now(), now(), '',
+       1, 2, (SELECT COALESCE(MAX(tree_id), 0) + 1 FROM goals_area), 0
+FROM goals_areatype WHERE code = 'bench';
+
+INSERT INTO goals_progress (component_id, area_id, groups, year, fiscal_year, value,
+                            remarks, created, last_modified, extras)
+SELECT c.id, a.id, '{}', 2000 + y, '', random() * 100, '', now(), now(), ''
+FROM (SELECT id FROM goals_component WHERE code LIKE 'BC%' ORDER BY id LIMIT 50000) c,
+     generate_series(1, 20) y,
+     goals_area a
+WHERE a.code = 'bench';
+
+ANALYZE goals_indicator;
+ANALYZE goals_component;
+ANALYZE goals_component_indicators;
+ANALYZE goals_progress;
+
+SAVEPOINT with_indexes;
+
+\echo '=== BEFORE: without trigram indexes ==='
+DROP INDEX goals_indicator_description_en_trgm;
+DROP INDEX goals_component_name_en_trgm;
+DROP INDEX goals_component_data_source_en_trgm;
+
+EXPLAIN ANALYZE
+SELECT id FROM goals_indicator WHERE UPPER(description_en::text) LIKE UPPER('%a1b2%');
+
+EXPLAIN ANALYZE
+SELECT id FROM goals_component WHERE UPPER(name_en::text) LIKE UPPER('%mortality 9f%');
+
+EXPLAIN ANALYZE
+SELECT DISTINCT i.id FROM goals_indicator i
+JOIN goals_component_indicators ci ON ci.indicator_id = i.id
+JOIN goals_component c ON c.id = ci.component_id
+WHERE UPPER(c.data_source_en::text) LIKE UPPER('%survey 00%');
+
+ROLLBACK TO SAVEPOINT with_indexes;
+
+\echo '=== AFTER: with trigram indexes ==='
+EXPLAIN ANALYZE
+SELECT id FROM goals_indicator WHERE UPPER(description_en::text) LIKE UPPER('%a1b2%');
+
+EXPLAIN ANALYZE
+SELECT id FROM goals_component WHERE UPPER(name_en::text) LIKE UPPER('%mortality 9f%');
+
+EXPLAIN ANALYZE
+SELECT DISTINCT i.id FROM goals_indicator i
+JOIN goals_component_indicators ci ON ci.indicator_id = i.id
+JOIN goals_component c ON c.id = ci.component_id
+WHERE UPPER(c.data_source_en::text) LIKE UPPER('%survey 00%');
+
+ROLLBACK;
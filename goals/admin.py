@@ -8,7 +8,7 @@ from .models import (Plan, Goal, Theme, SectorType, Sector, Target, Indicator,
                      Component, Progress, Area, AreaType)
 from .import_export import (AreaResource, GoalResource, ThemeResource,
                             SectorTypeResource, SectorResource, TargetResource,
-                            IndicatorResource)
+                            IndicatorResource, ProgressResource)
 
 
 class HiddenExtrasMixin:
@@ -169,6 +169,7 @@ class ComponentAdmin(HiddenExtrasMixin, ImportExportModelAdmin):
 
 
 class ProgressAdmin(HiddenExtrasMixin, ImportExportModelAdmin):
+    resource_class = ProgressResource
     ordering = ['id']
     search_fields = ['component__name', '^component__code',
                      '^component__indicators__code',
@@ -0,0 +1,218 @@
+import calendar
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils.http import (http_date, parse_http_date_safe, parse_etags,
+                               quote_etag)
+from django.utils.translation import get_language
+from rest_framework import status
+from rest_framework.response import Response
+from ..generations import get_generations, has_generation
+from .pagination import get_count
+
+
+API_CACHE_TIMEOUT = getattr(settings, 'GOALS_API_CACHE_TIMEOUT', 5 * 60)
+
+
+def _metric_key(view_name, metric):
+    return 'goals:api:cache:%s:%s' % (view_name, metric)
+
+
+def record_cache_metric(view_name, metric):
+    key = _metric_key(view_name, metric)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def get_cache_metrics(view_name):
+    """Return the cache hits, misses and hit rate of ``view_name``,
+    counted since the last reset.
+    """
+    keys = [_metric_key(view_name, m) for m in ('hit', 'miss')]
+    values = cache.get_many(keys)
+    hit, miss = values.get(keys[0], 0), values.get(keys[1], 0)
+    return {
+        'hit': hit,
+        'miss': miss,
+        'rate': float(hit) / (hit + miss) if hit + miss else None,
+    }
+
+
+def reset_cache_metrics(view_name):
+    cache.delete_many([_metric_key(view_name, m) for m in ('hit', 'miss')])
+
+
+class CacheResponseMixin(object):
+    """Caches the data of list and detail responses.
+
+    Cache keys include the request path, query string, language,
+    renderer format and the generations of ``cache_models`` (the
+    queryset model by default), so responses are invalidated whenever
+    any object of these models changes.
+    """
+    cache_timeout = API_CACHE_TIMEOUT
+    cache_models = None
+
+    def get_cache_models(self):
+        return self.cache_models or [self.get_queryset().model]
+
+    def get_cache_key(self, request):
+        parts = [
+            request.path,
+            sorted(request.query_params.lists()),
+            get_language(),
+            request.accepted_renderer.format,
+            get_generations(self.get_cache_models()),
+        ]
+        digest = hashlib.md5(json.dumps(parts).encode('utf-8')).hexdigest()
+        return 'goals:api:response:%s' % digest
+
+    def is_cacheable(self, request):
+        # The browsable API renders user specific forms
+        return request.method in ('GET', 'HEAD') \
+            and request.accepted_renderer.format != 'api'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not self.is_cacheable(request):
+            return handler(request, *args, **kwargs)
+        view_name = self.__class__.__name__
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            record_cache_metric(view_name, 'hit')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        record_cache_metric(view_name, 'miss')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, self.cache_timeout)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            super(CacheResponseMixin, self).list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super(CacheResponseMixin, self).retrieve, request, *args, **kwargs)
+
+
+class ConditionalResponseMixin(object):
+    """Adds ETag and Last-Modified validators to list and detail
+    responses and answers matching conditional GET requests with
+    ``304 Not Modified`` before anything is serialised.
+
+    List validators are computed from the generation of the queryset
+    model, or ``MAX(last_modified)`` of the filtered queryset for models
+    without one, and the cached count when the page is counted anyway.
+    Detail validators are computed from the ``last_modified`` of the
+    row. Changes of related models listed in ``cache_models`` are
+    accounted for through their generations.
+    """
+
+    def get_related_generations(self):
+        model = self.get_queryset().model
+        models = getattr(self, 'cache_models', None) or []
+        return get_generations([m for m in models if m is not model])
+
+    def get_etag(self, request, *parts):
+        parts = list(parts) + [
+            request.get_full_path(),
+            get_language(),
+            request.accepted_renderer.format,
+            self.get_related_generations(),
+        ]
+        digest = hashlib.md5(json.dumps(parts, default=str).encode('utf-8')).hexdigest()
+        return 'W/%s' % quote_etag(digest)
+
+    def etag_matches(self, request, etag):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if not if_none_match:
+            return False
+        etags = [e[2:] if e.startswith('W/') else e
+                 for e in parse_etags(if_none_match)]
+        return '*' in etags or etag[2:] in etags
+
+    def not_modified_since(self, request, last_modified):
+        since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        return since is not None and last_modified is not None \
+            and last_modified <= since
+
+    def conditional_response(self, handler, request, etag, last_modified=None,
+                             *args, **kwargs):
+        if last_modified is not None:
+            last_modified = calendar.timegm(last_modified.utctimetuple())
+        # If-Modified-Since is ignored when If-None-Match is present
+        if request.META.get('HTTP_IF_NONE_MATCH'):
+            not_modified = self.etag_matches(request, etag)
+        else:
+            not_modified = self.not_modified_since(request, last_modified)
+        if not_modified:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def get_list_fingerprint(self, request, queryset):
+        model = queryset.model
+        counts_rows = getattr(self.paginator, 'counts_rows', None)
+        counted = counts_rows is None or counts_rows(request, self)
+        if has_generation(model):
+            # Bumped by every change, deletes included
+            fingerprint = get_generations([model])
+        else:
+            fingerprint = [queryset.order_by().aggregate(
+                last_modified=Max('last_modified'))['last_modified']]
+            counted = True
+        if counted:
+            # Shares the cached count with the paginator
+            fingerprint.append(get_count(queryset))
+        return fingerprint
+
+    def list(self, request, *args, **kwargs):
+        handler = super(ConditionalResponseMixin, self).list
+        if request.method not in ('GET', 'HEAD'):
+            return handler(request, *args, **kwargs)
+        fingerprint = self.get_list_fingerprint(
+            request, self.filter_queryset(self.get_queryset()))
+        etag = self.get_etag(request, *fingerprint)
+        # Deleted rows do not change the latest modification time, so
+        # lists are only validated with their ETag.
+        return self.conditional_response(handler, request, etag, None,
+                                         *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        handler = super(ConditionalResponseMixin, self).retrieve
+        if request.method not in ('GET', 'HEAD'):
+            return handler(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            last_modified = queryset\
+                .filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})\
+                .values_list('last_modified', flat=True).first()
+        except (TypeError, ValueError):
+            last_modified = None
+        if last_modified is None:
+            # Let the handler respond with 404
+            return handler(request, *args, **kwargs)
+        etag = self.get_etag(request, last_modified)
+        if any(self.get_related_generations()):
+            # The representation also depends on other models, so the
+            # row modification time alone is not a valid validator.
+            last_modified = None
+        return self.conditional_response(handler, request, etag,
+                                         last_modified, *args, **kwargs)
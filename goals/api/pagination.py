@@ -0,0 +1,244 @@
+import base64
+import binascii
+import hashlib
+import json
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+from ..generations import get_generations
+
+
+COUNT_CACHE_TIMEOUT = getattr(settings, 'GOALS_API_COUNT_CACHE_TIMEOUT', 60)
+
+
+def _count_cache_key(queryset, mode):
+    sql, params = queryset.query.sql_with_params()
+    signature = json.dumps(
+        [mode, sql, params, get_generations([queryset.model])], default=str)
+    return 'goals:api:count:%s' % hashlib.md5(signature.encode('utf-8')).hexdigest()
+
+
+def estimate_count(queryset):
+    """Return the planner row estimate of ``queryset``.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) %s' % sql, params)
+        plan = cursor.fetchone()[0]
+    if not isinstance(plan, list):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def get_count(queryset, mode='exact'):
+    """Return the exact or estimated number of rows of ``queryset``,
+    cached per query for ``GOALS_API_COUNT_CACHE_TIMEOUT`` seconds.
+    """
+    try:
+        key = _count_cache_key(queryset, mode)
+    except EmptyResultSet:
+        return 0
+    count = cache.get(key)
+    if count is None:
+        if mode == 'estimate':
+            count = estimate_count(queryset)
+        else:
+            count = queryset.count()
+        cache.set(key, count, COUNT_CACHE_TIMEOUT)
+    return count
+
+
+class CachedCountPaginator(Paginator):
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, 'query'):
+            return get_count(self.object_list)
+        return super(CachedCountPaginator, self).count
+
+
+class KeysetPagination(PageNumberPagination):
+    """Page number pagination which switches to keyset pagination
+    when the ``cursor`` query parameter is given (``?cursor=`` for
+    the first page) on views defining ``keyset_ordering``.
+
+    Keyset pages are read with a ``WHERE`` on the last seen ordering
+    values instead of ``OFFSET`` and no total count is computed, so
+    walking deep pages costs the same as reading the first one. The
+    ``ordering`` query parameter is ignored in this mode.
+
+    Page number pages accept ``count`` (``exact``, ``estimate`` or
+    ``none``) to choose how the total count is computed.
+    """
+    django_paginator_class = CachedCountPaginator
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    count_query_param = 'count'
+    count_modes = ('exact', 'estimate', 'none')
+    default_count_mode = getattr(settings, 'GOALS_API_DEFAULT_COUNT', 'exact')
+
+    def get_keyset_ordering(self, view):
+        if getattr(view, 'action', None) != 'list':
+            return None
+        return getattr(view, 'keyset_ordering', None)
+
+    def counts_rows(self, request, view=None):
+        """Return whether the page of the request gets an exact count.
+        """
+        if self.cursor_query_param in request.query_params \
+                and self.get_keyset_ordering(view):
+            return False
+        return self.get_count_mode(request) == 'exact'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_ordering = self.get_keyset_ordering(view)
+        self.count_mode = None
+        if self.cursor_query_param not in request.query_params \
+                or not self.keyset_ordering:
+            self.keyset_ordering = None
+            self.count_mode = self.get_count_mode(request)
+            if self.count_mode == 'exact':
+                return super(KeysetPagination, self).paginate_queryset(
+                    queryset, request, view)
+            return self.paginate_without_count(queryset, request)
+        return self.paginate_keyset(queryset, request)
+
+    def get_count_mode(self, request):
+        mode = request.query_params.get(
+            self.count_query_param, self.default_count_mode)
+        if mode not in self.count_modes:
+            raise ValidationError({
+                self.count_query_param: 'Invalid choice %s. Valid choices are %s.' % (
+                    mode, ', '.join(self.count_modes))
+            })
+        return mode
+
+    def paginate_without_count(self, queryset, request):
+        """Slice the requested page reading one extra row to find out
+        whether a next page exists, instead of counting all rows.
+        """
+        self.request = request
+        self.display_page_controls = False
+        page_size = self.get_page_size(request)
+        try:
+            self.page_number = int(
+                request.query_params.get(self.page_query_param, 1))
+            if self.page_number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound('Invalid page.')
+        offset = (self.page_number - 1) * page_size
+        results = list(queryset[offset:offset + page_size + 1])
+        if not results and self.page_number > 1:
+            raise NotFound('Invalid page.')
+        self.has_next = len(results) > page_size
+        self.total = None
+        if self.count_mode == 'estimate':
+            self.total = max(get_count(queryset, 'estimate'),
+                             offset + len(results[:page_size]))
+        return results[:page_size]
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(
+                cursor.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) \
+                or len(values) != len(self.keyset_ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def encode_cursor(self, values):
+        return base64.urlsafe_b64encode(
+            json.dumps(values).encode('utf-8')).decode('ascii')
+
+    def get_keyset_filter(self, values):
+        """Return a ``Q`` matching rows after ``values`` in the keyset
+        ordering, e.g. ``year < y OR (year = y AND id > i)``.
+        """
+        query = Q()
+        for i, field in enumerate(self.keyset_ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition = Q(**{'%s__%s' % (name, lookup): values[i]})
+            for previous, value in zip(self.keyset_ordering[:i], values[:i]):
+                condition &= Q(**{previous.lstrip('-'): value})
+            query |= condition
+        return query
+
+    def paginate_keyset(self, queryset, request):
+        self.request = request
+        self.display_page_controls = False
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.keyset_ordering)
+        values = self.decode_cursor(request)
+        if values is not None:
+            try:
+                queryset = queryset.filter(self.get_keyset_filter(values))
+                results = list(queryset[:page_size + 1])
+            except (TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+        else:
+            results = list(queryset[:page_size + 1])
+        self.next_cursor = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            last = results[-1]
+            self.next_cursor = self.encode_cursor([
+                getattr(last, f.lstrip('-')) for f in self.keyset_ordering])
+        return results
+
+    def get_next_link(self):
+        if not self.keyset_ordering:
+            if self.count_mode == 'exact':
+                return super(KeysetPagination, self).get_next_link()
+            if not self.has_next:
+                return None
+            return replace_query_param(self.request.build_absolute_uri(),
+                                       self.page_query_param,
+                                       self.page_number + 1)
+        if self.next_cursor is None:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(
+            url, self.cursor_query_param, self.next_cursor)
+
+    def get_previous_link(self):
+        if self.count_mode == 'exact':
+            return super(KeysetPagination, self).get_previous_link()
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param,
+                                   self.page_number - 1)
+
+    def get_paginated_response(self, data):
+        if not self.keyset_ordering:
+            if self.count_mode == 'exact':
+                return super(KeysetPagination, self).get_paginated_response(data)
+            return Response(OrderedDict([
+                ('count', self.total),
+                ('next', self.get_next_link()),
+                ('previous', self.get_previous_link()),
+                ('results', data)
+            ]))
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data)
+        ]))
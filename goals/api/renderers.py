@@ -1,3 +1,6 @@
+import json
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils import encoders
 from rest_framework_csv.renderers import CSVStreamingRenderer
 
 
@@ -8,3 +11,27 @@ class CSVRenderer (CSVStreamingRenderer):
         if not isinstance(data, list) and self.results_field in data:
             data = data.get(self.results_field, [])
         return super(CSVRenderer, self).render(data, *args, **kwargs)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Renders a list as newline delimited JSON, one object per line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+    results_field = 'results'
+
+    def render_lines(self, data):
+        if not isinstance(data, list):
+            if isinstance(data, dict) and self.results_field in data:
+                data = data.get(self.results_field, [])
+            else:
+                data = [data]
+        for item in data:
+            yield (json.dumps(item, cls=encoders.JSONEncoder) + '\n')\
+                .encode('utf-8')
+
+    def render(self, data, media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return b''.join(self.render_lines(data))
@@ -1,10 +1,46 @@
-from django.forms.models import model_to_dict
+from django.db import models, transaction, IntegrityError
 from rest_framework import serializers
 from ..models import (Area, AreaType, Plan, Theme, SectorType, Sector,
-                      Goal, Target, Indicator, Component, Progress)
-
-
-class ProgressSerializer(serializers.ModelSerializer):
+                      Goal, Target, Indicator, Component, Progress,
+                      FlatProgress)
+from ..previews import get_progress_previews
+from ..loaders import PROGRESS_NATURAL_KEY
+
+
+def get_requested_fields(request, names):
+    """Return the subset of field ``names`` selected with the
+    ``fields`` and ``exclude`` query parameters of ``request``.
+    """
+    selected = set(names)
+    params = getattr(request, 'query_params', {})
+    fields = [f.strip() for f in params.get('fields', '').split(',') if f.strip()]
+    exclude = [f.strip() for f in params.get('exclude', '').split(',') if f.strip()]
+    if fields:
+        selected &= set(fields)
+    return selected - set(exclude)
+
+
+class DynamicFieldsMixin(object):
+    """Limits the fields of read responses to the ones selected with
+    ``?fields=`` and ``?exclude=``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(DynamicFieldsMixin, self).__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return
+        selected = get_requested_fields(request, self.fields.keys())
+        for name in list(self.fields.keys()):
+            if name not in selected:
+                self.fields.pop(name)
+
+
+class ModelSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    pass
+
+
+class ProgressSerializer(ModelSerializer):
     area_code = serializers.CharField(read_only=True)
     area_name = serializers.CharField(read_only=True)
     area_type_id = serializers.IntegerField(read_only=True,
@@ -16,16 +52,57 @@ class ProgressSerializer(serializers.ModelSerializer):
     class Meta:
         model = Progress
         exclude = []
+        extra_kwargs = {'groups': {'allow_null': True}}
+
+    def validate_groups(self, value):
+        # Null is stored as no groups, see the natural key
+        return value or []
+
+    # Whether create() updated the progress with the same natural key
+    updated_existing = False
+
+    def create(self, validated_data):
+        # Update the progress with the same natural key if it exists
+        lookup = dict(
+            (name, validated_data.get(name, Progress._meta.get_field(name).get_default()))
+            for name in PROGRESS_NATURAL_KEY)
+        instance = Progress.objects.filter(**lookup).first()
+        if instance is None:
+            try:
+                with transaction.atomic():
+                    return super(ProgressSerializer, self).create(validated_data)
+            except IntegrityError:
+                # Created concurrently since the lookup
+                instance = Progress.objects.filter(**lookup).first()
+                if instance is None:
+                    raise
+        self.updated_existing = True
+        return self.update(instance, validated_data)
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super(ProgressSerializer, self).update(instance, validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                'Progress with this %s already exists.' % ', '.join(PROGRESS_NATURAL_KEY))
+
+
+class FlatProgressSerializer(ModelSerializer):
+
+    class Meta:
+        model = FlatProgress
+        fields = '__all__'
 
 
-class AreaTypeSerializer(serializers.ModelSerializer):
+class AreaTypeSerializer(ModelSerializer):
 
     class Meta:
         model = AreaType
         fields = '__all__'
 
 
-class AreaSerializer(serializers.ModelSerializer):
+class AreaSerializer(ModelSerializer):
     image_small = serializers.ImageField(read_only=True)
     image_medium = serializers.ImageField(read_only=True)
     image_large = serializers.ImageField(read_only=True)
@@ -37,14 +114,14 @@ class AreaSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class SectorTypeSerializer(serializers.ModelSerializer):
+class SectorTypeSerializer(ModelSerializer):
 
     class Meta:
         model = SectorType
         fields = '__all__'
 
 
-class SectorSerializer(serializers.ModelSerializer):
+class SectorSerializer(ModelSerializer):
     api_url = serializers.SerializerMethodField()
 
     class Meta:
@@ -56,7 +133,7 @@ class SectorSerializer(serializers.ModelSerializer):
             .build_absolute_uri(obj.api_url)
 
 
-class PlanSerializer(serializers.ModelSerializer):
+class PlanSerializer(ModelSerializer):
     image_small = serializers.ImageField(read_only=True)
     image_medium = serializers.ImageField(read_only=True)
     image_large = serializers.ImageField(read_only=True)
@@ -71,7 +148,7 @@ class PlanSerializer(serializers.ModelSerializer):
             .build_absolute_uri(obj.api_url)
 
 
-class ThemeSerializer(serializers.ModelSerializer):
+class ThemeSerializer(ModelSerializer):
     image_small = serializers.ImageField(read_only=True)
     image_medium = serializers.ImageField(read_only=True)
     image_large = serializers.ImageField(read_only=True)
@@ -96,7 +173,7 @@ class GoalSerializer(ThemeSerializer):
         exclude = []
 
 
-class TargetSerializer(serializers.ModelSerializer):
+class TargetSerializer(ModelSerializer):
     image_small = serializers.ImageField(read_only=True)
     image_medium = serializers.ImageField(read_only=True)
     image_large = serializers.ImageField(read_only=True)
@@ -116,7 +193,19 @@ class TargetSerializer(serializers.ModelSerializer):
             .build_absolute_uri(obj.api_url)
 
 
-class IndicatorSerializer(serializers.ModelSerializer):
+class IndicatorListSerializer(serializers.ListSerializer):
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        iterable = list(iterable)
+        if 'progress_preview' in self.child.fields:
+            # Fetch progress previews for all indicators at once
+            self.child.progress_previews = get_progress_previews(
+                [obj.pk for obj in iterable])
+        return super(IndicatorListSerializer, self).to_representation(iterable)
+
+
+class IndicatorSerializer(ModelSerializer):
     image_small = serializers.ImageField(read_only=True)
     image_medium = serializers.ImageField(read_only=True)
     image_large = serializers.ImageField(read_only=True)
@@ -138,41 +227,35 @@ class IndicatorSerializer(serializers.ModelSerializer):
     plan_code = serializers.CharField(read_only=True)
     plan_name = serializers.CharField(read_only=True)
     api_url = serializers.SerializerMethodField()
-    progress_count = serializers.IntegerField(read_only=True)
     progress_preview = serializers.SerializerMethodField()
 
     class Meta:
         model = Indicator
         fields = '__all__'
+        list_serializer_class = IndicatorListSerializer
 
     def get_progress_preview(self, obj):
-        progress_preview = []
-        if obj._prefetched_objects_cache['components']:
-            for c in obj._prefetched_objects_cache['components']:
-                for p in c.progress_preview:
-                    progress_preview.append(model_to_dict(p))
-        return progress_preview
+        previews = getattr(self, 'progress_previews', None)
+        if previews is None or obj.pk not in previews:
+            previews = get_progress_previews([obj.pk])
+        return previews[obj.pk]
 
     def get_api_url(self, obj):
         return self.context.get('request')\
             .build_absolute_uri(obj.api_url)
 
 
-class ComponentSerializer(serializers.ModelSerializer):
+class ComponentSerializer(ModelSerializer):
     image_small = serializers.ImageField(read_only=True)
     image_medium = serializers.ImageField(read_only=True)
     image_large = serializers.ImageField(read_only=True)
     indicators_names = serializers.ListField(read_only=True)
-    targets_ids = serializers.ListField(read_only=True)
     targets_codes = serializers.ListField(read_only=True)
     targets_names = serializers.ListField(read_only=True)
-    goals_ids = serializers.ListField(read_only=True)
     goals_codes = serializers.CharField(read_only=True)
     goals_names = serializers.ListField(read_only=True)
-    plans_ids = serializers.ListField(read_only=True)
     plans_codes = serializers.ListField(read_only=True)
     plans_names = serializers.ListField(read_only=True)
-    progress_count = serializers.IntegerField(read_only=True)
     api_url = serializers.SerializerMethodField()
 
     class Meta:
@@ -1,29 +1,194 @@
+import json
+from collections import OrderedDict
+from itertools import islice
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django.template.defaultfilters import slugify
-from django.db.models import Count, Prefetch
-from rest_framework import viewsets
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, Sum, Avg, Min, Max, F, prefetch_related_objects
+from modeltranslation.translator import translator, NotRegistered
+from rest_framework import serializers, status, viewsets
+from rest_framework.decorators import list_route, detail_route
+from rest_framework.exceptions import ValidationError, PermissionDenied
+from rest_framework.response import Response
+from rest_framework.utils import encoders
+from .renderers import CSVRenderer, NDJSONRenderer
+from .mixins import ConditionalResponseMixin, CacheResponseMixin
 from .serializers import (AreaSerializer, AreaTypeSerializer,
                           PlanSerializer, ThemeSerializer, GoalSerializer,
                           SectorTypeSerializer, SectorSerializer,
                           TargetSerializer, IndicatorSerializer,
-                          ComponentSerializer, ProgressSerializer)
+                          ComponentSerializer, ProgressSerializer,
+                          FlatProgressSerializer)
 from ..models import (AreaType, Area, Plan, Theme, SectorType, Sector, Goal,
-                      Target, Indicator, Component, Progress)
+                      Target, Indicator, Component, Progress, FlatProgress)
+from ..rollups import get_rollup
+from ..series import get_series
+from ..loaders import ProgressBulkWriter
 from ..filters import (AreaFilter, PlanFilter, GoalFilter, ThemeFilter,
                        SectorFilter, TargetFilter, IndicatorFilter,
-                       ComponentFilter, ProgressFilter)
+                       ComponentFilter, ProgressFilter, FlatProgressFilter)
 
 
-class ModelViewSet(viewsets.ModelViewSet):
+EXPORT_CHUNK_SIZE = getattr(settings, 'GOALS_API_EXPORT_CHUNK_SIZE', 2000)
+
+PROGRESS_BULK_MAX_RECORDS = getattr(settings, 'GOALS_PROGRESS_BULK_MAX_RECORDS', 10000)
+
+SERIES_MAX_AREAS = getattr(settings, 'GOALS_SERIES_MAX_AREAS', 100)
+
+
+def to_csv_value(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, cls=encoders.JSONEncoder)
+    return value
+
+
+def get_int_list_param(request, name):
+    values = request.query_params.get(name, '')
+    try:
+        return [int(v) for v in values.split(',') if v.strip()]
+    except ValueError:
+        raise ValidationError({name: 'Enter a comma separated list of integers.'})
+
+
+def get_list_param(request, name):
+    return [v.strip() for v in request.query_params.get(name, '').split(',')
+            if v.strip()]
+
+
+def get_only_fields(model, serializer_fields):
+    """Return the names of the model fields needed to render
+    ``serializer_fields``, including their translation columns.
+    """
+    try:
+        translated = translator.get_options_for_model(model).fields
+    except NotRegistered:
+        translated = {}
+    names = set([model._meta.pk.name])
+    for field in serializer_fields.values():
+        if isinstance(field, serializers.SerializerMethodField):
+            # api_url and progress_preview only need the primary key
+            continue
+        source = field.source.split('.')[0]
+        if source == '*':
+            return None
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            image_source = getattr(getattr(model, source, None),
+                                   'source_field_name', None)
+            if image_source:
+                # imagekit spec generated from an image field
+                source = image_source
+            else:
+                # Derived from extras with foreign keys as fallback
+                names.update(f.name for f in model._meta.concrete_fields
+                             if f.name == 'extras' or f.is_relation)
+                continue
+        else:
+            if model_field.many_to_many or model_field.one_to_many:
+                continue
+            source = model_field.name
+        names.add(source)
+        names.update(f.name for f in translated.get(source, ()))
+    return names
+
+
+class ModelViewSet(ConditionalResponseMixin, CacheResponseMixin,
+                   viewsets.ModelViewSet):
+
+    def get_queryset(self):
+        """Narrow the columns and prefetches of read requests to the
+        fields selected with ``?fields=`` and ``?exclude=``.
+        """
+        queryset = super(ModelViewSet, self).get_queryset()
+        if self.request is None or self.request.method not in ('GET', 'HEAD') \
+                or getattr(self, 'action', None) not in ('list', 'retrieve', 'export'):
+            return queryset
+        params = self.request.query_params
+        if not params.get('fields') and not params.get('exclude'):
+            return queryset
+        fields = self.get_serializer().fields
+        sources = set(f.source.split('.')[0] for f in fields.values())
+        prefetches = [lookup for lookup in queryset._prefetch_related_lookups
+                      if getattr(lookup, 'prefetch_through', lookup)
+                      .split('__')[0] in sources]
+        queryset = queryset.prefetch_related(None).prefetch_related(*prefetches)
+        only = get_only_fields(queryset.model, fields)
+        if only is not None:
+            # Keyset pagination reads the ordering values of the last row
+            only.update(f.lstrip('-') for f in getattr(self, 'keyset_ordering', ()))
+            queryset = queryset.only(*only)
+        return queryset
 
     def finalize_response(self, request, response, *args, **kwargs):
         response = super(ModelViewSet, self).finalize_response(
             request, response, *args, **kwargs)
         filename = '%s-%s.csv' % (slugify(self.get_view_name()), timezone.now().isoformat())
-        if response.accepted_renderer.format == 'csv':
+        # Streamed exports are not rendered by DRF
+        renderer = getattr(response, 'accepted_renderer', None)
+        if renderer is not None and renderer.format == 'csv':
             response['content-disposition'] = 'attachment; filename=%s' % filename
         return response
 
+    def iter_export_chunks(self, queryset):
+        """Serialize ``queryset`` read with a server-side cursor in
+        chunks of ``GOALS_API_EXPORT_CHUNK_SIZE`` objects.
+        """
+        prefetches = queryset._prefetch_related_lookups
+        objects = queryset.iterator()
+        while True:
+            chunk = list(islice(objects, EXPORT_CHUNK_SIZE))
+            if not chunk:
+                break
+            if prefetches:
+                # iterator() ignores prefetch_related()
+                prefetch_related_objects(chunk, *prefetches)
+            yield self.get_serializer(chunk, many=True).data
+
+    def iter_ndjson(self, chunks):
+        renderer = NDJSONRenderer()
+        for data in chunks:
+            for line in renderer.render_lines(list(data)):
+                yield line
+
+    def iter_csv(self, chunks):
+        """Render CSV lines with a column per serializer field. Lists
+        and objects are written as JSON so the columns don't depend on
+        the values.
+        """
+        renderer = CSVRenderer()
+        header = list(self.get_serializer().fields.keys())
+        first = True
+        for data in chunks:
+            rows = [dict((k, to_csv_value(v)) for k, v in item.items())
+                    for item in data]
+            lines = renderer.render(rows, renderer_context={'header': header})
+            if not first:
+                lines = islice(lines, 1, None)
+            first = False
+            for line in lines:
+                yield line
+
+    @list_route(methods=['get'], renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request, *args, **kwargs):
+        """Stream all objects matching the filters as newline delimited
+        JSON (``export.ndjson``) or CSV (``export.csv``) without
+        pagination.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        chunks = self.iter_export_chunks(queryset)
+        if request.accepted_renderer.format == 'csv':
+            response = StreamingHttpResponse(
+                self.iter_csv(chunks), content_type='text/csv; charset=utf-8')
+            response['content-disposition'] = 'attachment; filename=%s-%s.csv' % (
+                slugify(self.get_view_name()), timezone.now().isoformat())
+        else:
+            response = StreamingHttpResponse(
+                self.iter_ndjson(chunks), content_type=NDJSONRenderer.media_type)
+        return response
+
 
 class AreaTypeViewSet(ModelViewSet):
     queryset = AreaType.objects.all()
@@ -36,6 +201,21 @@ class AreaViewSet(ModelViewSet):
     filter_class = AreaFilter
     ordering_fields = ('id', 'code', 'name', 'type')
 
+    @detail_route(methods=['get'])
+    def rollup(self, request, *args, **kwargs):
+        """Progress totals of the area and all its descendants
+        per component and year. ``groups`` (comma separated) selects
+        disaggregated values.
+        """
+        area = self.get_object()
+        components = get_int_list_param(request, 'component')
+        years = get_int_list_param(request, 'year')
+        groups = get_list_param(request, 'groups')
+        return Response({
+            'area': area.pk,
+            'results': get_rollup(area, components, years, groups)
+        })
+
 
 class PlanViewSet(ModelViewSet):
     queryset = Plan.objects.all()
@@ -84,28 +264,24 @@ class TargetViewSet(ModelViewSet):
 
 
 class IndicatorViewSet(ModelViewSet):
+    queryset = Indicator.objects.all()
     serializer_class = IndicatorSerializer
+    cache_models = (Indicator, Component, Progress)
     filter_class = IndicatorFilter
     ordering_fields = ('id', 'code', 'stats_available', 'progress_count')
     ordering = ('code',)
-
-    def get_queryset(self):
-        progq = Progress.objects\
-            .order_by('component__indicators', '-year', 'area__level')\
-            .distinct('component__indicators')
-        return Indicator.objects\
-            .annotate(progress_count=Count('components__progress'))\
-            .prefetch_related(Prefetch('components__progress', to_attr='progress_preview', queryset=progq))
+    keyset_ordering = ('code', 'id')
 
 
 class ComponentViewSet(ModelViewSet):
-    queryset = Component.objects.annotate(
-        progress_count=Count('progress')).prefetch_related('indicators')
+    queryset = Component.objects.prefetch_related('indicators')
     serializer_class = ComponentSerializer
+    cache_models = (Component, Indicator, Progress)
     filter_class = ComponentFilter
     ordering_fields = ('id', 'code', 'indicator', 'created',
                        'last_modified', 'progress_count')
     ordering = ('code',)
+    keyset_ordering = ('code', 'id')
 
 
 class ProgressViewSet(ModelViewSet):
@@ -115,3 +291,145 @@ class ProgressViewSet(ModelViewSet):
     ordering_fields = ('id', 'year', 'value', 'area',
                        'last_modified', 'created')
     ordering = ('-year',)
+    keyset_ordering = ('-year', 'id')
+    aggregate_groups = {
+        'year': 'year',
+        'area': 'area',
+        'component': 'component',
+        'area_type': 'area__type',
+        'groups': 'groups',
+    }
+    aggregate_functions = {
+        'sum': Sum,
+        'avg': Avg,
+        'min': Min,
+        'max': Max,
+        'count': Count,
+    }
+
+    def create(self, request, *args, **kwargs):
+        """Create a progress object, or update the one with the same
+        component, area, year, fiscal_year and groups and respond with
+        200 instead of 201.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, headers=headers, status=(
+            status.HTTP_200_OK if serializer.updated_existing
+            else status.HTTP_201_CREATED))
+
+    def get_aggregate_param(self, name, choices, default):
+        values = self.request.query_params.get(name, default)
+        values = [v.strip() for v in values.split(',') if v.strip()]
+        invalid = [v for v in values if v not in choices]
+        if invalid:
+            raise ValidationError({
+                name: 'Invalid choice(s) %s. Valid choices are %s.' % (
+                    ', '.join(invalid), ', '.join(sorted(choices)))
+            })
+        return values
+
+    @list_route(methods=['get'])
+    def aggregate(self, request, *args, **kwargs):
+        """Aggregate progress values of the filtered queryset.
+
+        Accepts all progress filters plus ``group_by`` (any of
+        year, area, component, area_type, groups) and ``agg`` (any
+        of sum, avg, min, max, count). Only totals are aggregated
+        unless grouped or filtered by ``groups``.
+        """
+        group_by = self.get_aggregate_param(
+            'group_by', self.aggregate_groups, 'year')
+        aggs = self.get_aggregate_param(
+            'agg', self.aggregate_functions, 'sum')
+        if not aggs:
+            raise ValidationError({'agg': 'This field may not be blank.'})
+        values = dict((g, F(self.aggregate_groups[g])) for g in group_by
+                      if self.aggregate_groups[g] != g)
+        annotations = dict(
+            (a, self.aggregate_functions[a]('value')) for a in aggs)
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        if 'groups' not in group_by and 'groups' not in request.query_params:
+            # Disaggregated values would be added to the totals
+            queryset = queryset.filter(groups=[])
+        if not group_by:
+            return Response(queryset.aggregate(**annotations))
+        queryset = queryset\
+            .annotate(**values)\
+            .values(*group_by)\
+            .annotate(**annotations)\
+            .order_by(*group_by)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(queryset)
+
+    @list_route(methods=['get'])
+    def series(self, request, *args, **kwargs):
+        """Time series of a ``component`` in one or more ``area``
+        (comma separated ids) with years, values, gaps, the latest
+        value and the trend (slope per year). ``groups`` (comma
+        separated) selects disaggregated values.
+        """
+        components = get_int_list_param(request, 'component')
+        if len(components) != 1:
+            raise ValidationError({'component': 'Enter a single component id.'})
+        areas = get_int_list_param(request, 'area')
+        if not areas:
+            raise ValidationError({'area': 'This field is required.'})
+        if len(areas) > SERIES_MAX_AREAS:
+            raise ValidationError({
+                'area': 'Ensure there are no more than %d areas.' % SERIES_MAX_AREAS
+            })
+        groups = get_list_param(request, 'groups')
+        return Response({
+            'component': components[0],
+            'results': get_series(components[0], areas, groups)
+        })
+
+    @list_route(methods=['post'])
+    def bulk(self, request, *args, **kwargs):
+        """Create or update a list of progress objects matched on
+        component, area, year, fiscal_year and groups.
+
+        Returns the status (created, updated or error) of every item,
+        with a 400 status when a batch of items failed to be written.
+        """
+        if not request.user.has_perms(['goals.add_progress', 'goals.change_progress']):
+            raise PermissionDenied()
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({'non_field_errors': 'Expected a list of objects.'})
+        if len(items) > PROGRESS_BULK_MAX_RECORDS:
+            raise ValidationError({
+                'non_field_errors': 'Ensure there are no more than %d objects.'
+                % PROGRESS_BULK_MAX_RECORDS
+            })
+        writer = ProgressBulkWriter()
+        results = writer.write(items)
+        statuses = [r['status'] for r in results]
+        return Response(OrderedDict([
+            ('created', statuses.count('created')),
+            ('updated', statuses.count('updated')),
+            ('errors', statuses.count('error')),
+            ('failed_batches', writer.failed_batches),
+            ('results', results),
+        ]), status=(status.HTTP_400_BAD_REQUEST if writer.failed_batches
+                    else status.HTTP_200_OK))
+
+
+class FlatProgressViewSet(ModelViewSet):
+    """Read-only progress with the labels of all related objects,
+    served from a materialized view refreshed shortly after changes.
+    """
+    queryset = FlatProgress.objects.all()
+    serializer_class = FlatProgressSerializer
+    filter_class = FlatProgressFilter
+    http_method_names = ['get', 'head', 'options']
+    ordering_fields = ('id', 'year', 'value', 'area', 'area_code',
+                       'component_code', 'last_modified', 'created')
+    ordering = ('-year',)
+    keyset_ordering = ('-year', 'id')
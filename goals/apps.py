@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class GoalsConfig(AppConfig):
     name = 'goals'
     verbose_name = 'Development Goals'
+
+    def ready(self):
+        from . import (rollups, propagation, counters, previews, generations,  # noqa
+                       readmodels, series)
@@ -0,0 +1,102 @@
+from django.db import connection
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import Indicator, Component, Progress
+from .signals import progress_bulk_changed
+from .generations import bump_generations
+
+
+COMPONENT_COUNT_SQL = """
+UPDATE goals_component c
+SET progress_count = (
+    SELECT COUNT(*) FROM goals_progress p WHERE p.component_id = c.id)
+"""
+
+INDICATOR_COUNT_SQL = """
+UPDATE goals_indicator i
+SET progress_count = (
+    SELECT COUNT(*) FROM goals_progress p
+    JOIN goals_component_indicators ci ON ci.component_id = p.component_id
+    WHERE ci.indicator_id = i.id)
+"""
+
+
+def update_component_progress_counts(component_ids=None):
+    """Recount progress of the given (or all) components.
+    """
+    sql, params = COMPONENT_COUNT_SQL, []
+    if component_ids is not None:
+        sql += 'WHERE c.id = ANY(%s)'
+        params = [list(component_ids)]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def update_indicator_progress_counts(indicator_ids=None):
+    """Recount progress of the given (or all) indicators.
+    """
+    sql, params = INDICATOR_COUNT_SQL, []
+    if indicator_ids is not None:
+        sql += 'WHERE i.id = ANY(%s)'
+        params = [list(indicator_ids)]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def refresh_progress_counts(component_ids=None):
+    """Recount progress of the given (or all) components and of
+    the indicators they belong to.
+    """
+    update_component_progress_counts(component_ids)
+    indicator_ids = None
+    if component_ids is not None:
+        indicator_ids = Component.indicators.through.objects\
+            .filter(component_id__in=component_ids)\
+            .values_list('indicator_id', flat=True).distinct()
+    update_indicator_progress_counts(indicator_ids)
+    bump_generations(Component, Indicator)
+
+
+def increment_progress_count(component_id, step):
+    Component.objects.filter(id=component_id)\
+        .update(progress_count=F('progress_count') + step)
+    Indicator.objects.filter(components=component_id)\
+        .update(progress_count=F('progress_count') + step)
+
+
+@receiver(post_save, sender=Progress)
+def progress_saved(sender, instance, created, raw=False, **kwargs):
+    if created:
+        increment_progress_count(instance.component_id, 1)
+        return
+    loaded_component_id = getattr(instance, '_loaded_values', {})\
+        .get('component_id', instance.component_id)
+    if loaded_component_id != instance.component_id:
+        refresh_progress_counts([loaded_component_id, instance.component_id])
+
+
+@receiver(post_delete, sender=Progress)
+def progress_deleted(sender, instance, **kwargs):
+    increment_progress_count(instance.component_id, -1)
+
+
+@receiver(progress_bulk_changed, sender=Progress)
+def progress_bulk_saved(sender, component_ids, **kwargs):
+    refresh_progress_counts(component_ids)
+
+
+@receiver(m2m_changed, sender=Component.indicators.through)
+def component_indicators_counts_changed(sender, instance, action, reverse,
+                                        pk_set=None, **kwargs):
+    if reverse:
+        # instance is an indicator
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            update_indicator_progress_counts([instance.pk])
+    elif action == 'pre_clear':
+        instance._cleared_indicators_ids = list(
+            instance.indicators.values_list('id', flat=True))
+    elif action == 'post_clear':
+        update_indicator_progress_counts(instance._cleared_indicators_ids)
+    elif action in ('post_add', 'post_remove'):
+        update_indicator_progress_counts(pk_set)
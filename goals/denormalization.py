@@ -0,0 +1,134 @@
+import json
+from collections import defaultdict
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+from .models import Theme, Sector, Target, Indicator
+from .generations import bump_generations
+
+
+class IndicatorDenormalizer(object):
+    """Computes the denormalised fields of many indicators from
+    preloaded theme, target, goal, plan and sector maps.
+
+    Building the maps takes three queries no matter how many
+    indicators are denormalised afterwards.
+    """
+
+    def __init__(self, theme_ids=(), target_ids=(), sector_ids=()):
+        self.themes = {}
+        self.targets = {}
+        self.sectors = {}
+        self.trees = defaultdict(list)
+        self.load(theme_ids, target_ids, sector_ids)
+
+    def load(self, theme_ids=(), target_ids=(), sector_ids=()):
+        """Add the themes, targets and sector trees of the given ids
+        which are not loaded yet to the maps.
+        """
+        theme_ids = set(i for i in theme_ids if i) - set(self.themes)
+        target_ids = set(i for i in target_ids if i) - set(self.targets)
+        sector_ids = set(i for i in sector_ids if i) - set(self.sectors)
+        if theme_ids:
+            self.themes.update(Theme.objects.select_related('plan')
+                               .in_bulk(theme_ids))
+        if target_ids:
+            self.targets.update(Target.objects.select_related('goal__plan')
+                                .in_bulk(target_ids))
+        if sector_ids:
+            tree_ids = set(Sector.objects.filter(id__in=sector_ids)
+                           .values_list('tree_id', flat=True))
+            for tree_id in tree_ids:
+                self.trees[tree_id] = []
+            for sector in Sector.objects.filter(tree_id__in=tree_ids)\
+                    .select_related('type').order_by('tree_id', 'lft'):
+                self.sectors[sector.id] = sector
+                self.trees[sector.tree_id].append(sector)
+
+    @classmethod
+    def for_indicators(cls, indicators):
+        return cls(theme_ids=[i.theme_id for i in indicators],
+                   target_ids=[i.target_id for i in indicators],
+                   sector_ids=[i.sector_id for i in indicators])
+
+    def get_ancestors(self, sector):
+        return [s for s in self.trees[sector.tree_id]
+                if s.lft < sector.lft and s.rght > sector.rght]
+
+    def apply(self, indicator):
+        """Set the denormalised fields on ``indicator`` without saving it.
+        """
+        # Relations which were not preloaded, e.g. of existing rows
+        self.load([indicator.theme_id], [indicator.target_id],
+                  [indicator.sector_id])
+        theme = self.themes.get(indicator.theme_id)
+        target = self.targets.get(indicator.target_id)
+        sector = self.sectors.get(indicator.sector_id)
+        if theme and target and theme.plan_id != target.goal.plan_id:
+            raise ValidationError(
+                _('Theme and Target must belong to the same plan'))
+        if indicator.extras is None:
+            indicator.extras = {}
+        extras = indicator.extras
+        if theme:
+            extras['theme_code'] = theme.code
+            extras['theme_name'] = theme.name
+        if sector:
+            ancestors = self.get_ancestors(sector)
+            root = ancestors[0] if ancestors else sector
+            indicator.sectors_ids = [s.id for s in ancestors] + [sector.id]
+            extras['sector_code'] = sector.code
+            extras['sector_name'] = sector.name
+            extras['sectors_codes'] = json.dumps([s.code for s in ancestors] + [sector.code])
+            extras['sectors_names'] = json.dumps([s.name for s in ancestors] + [sector.name])
+            extras['sector_type_code'] = sector.type.code
+            extras['sector_type_name'] = sector.type.name
+            extras['root_sector_id'] = root.id
+            extras['root_sector_code'] = root.code
+            extras['root_sector_name'] = root.name
+        if target:
+            goal = target.goal
+            extras['target_code'] = target.code
+            extras['target_name'] = target.name
+            extras['goal_id'] = goal.id
+            extras['goal_code'] = goal.code
+            extras['goal_name'] = goal.name
+        plan = target.goal.plan if target else theme.plan if theme else None
+        if plan:
+            indicator.plan_id = plan.id
+            extras['plan_code'] = plan.code
+            extras['plan_name'] = plan.name
+        return indicator
+
+
+def recompute_indicators(queryset, batch_size=500):
+    """Recompute and store the denormalised fields of the indicators in
+    ``queryset`` batch by batch.
+
+    Returns the number of updated indicators and a list of
+    ``(indicator id, ValidationError)`` for the ones which failed.
+    """
+    queryset = queryset.order_by('id')
+    last_id, updated, errors = 0, 0, []
+    while True:
+        indicators = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not indicators:
+            break
+        last_id = indicators[-1].id
+        denormalizer = IndicatorDenormalizer.for_indicators(indicators)
+        with transaction.atomic():
+            for indicator in indicators:
+                try:
+                    denormalizer.apply(indicator)
+                except ValidationError as e:
+                    errors.append((indicator.id, e))
+                    continue
+                Indicator.objects.filter(id=indicator.id).update(
+                    extras=indicator.extras,
+                    sectors_ids=indicator.sectors_ids,
+                    plan_id=indicator.plan_id,
+                    last_modified=timezone.now())
+                updated += 1
+    bump_generations(Indicator)
+    return updated, errors
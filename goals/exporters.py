@@ -0,0 +1,86 @@
+from itertools import islice
+from django.contrib.postgres.fields.hstore import KeyTransform
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+
+# (column, source, arrow type) of exported progress facts. Sources
+# starting with "extras:" are read from the denormalised extras.
+PROGRESS_COLUMNS = [
+    ('id', 'id', 'int64'),
+    ('component_id', 'component_id', 'int64'),
+    ('component_code', 'extras:component_code', 'string'),
+    ('area_id', 'area_id', 'int64'),
+    ('area_code', 'extras:area_code', 'string'),
+    ('area_type_code', 'extras:area_type_code', 'string'),
+    ('area_type_name', 'extras:area_type_name', 'string'),
+    ('value_unit', 'extras:value_unit', 'string'),
+    ('year', 'year', 'int32'),
+    ('fiscal_year', 'fiscal_year', 'string'),
+    ('value', 'value', 'float64'),
+    ('groups', 'groups', 'list<string>'),
+    ('last_modified', 'last_modified', 'timestamp'),
+]
+
+FORMATS = ('parquet', 'arrow')
+
+
+def get_arrow_schema():
+    types = {
+        'int32': pa.int32(),
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'string': pa.string(),
+        'list<string>': pa.list_(pa.string()),
+        'timestamp': pa.timestamp('us', tz='UTC'),
+    }
+    return pa.schema([pa.field(name, types[t]) for name, source, t in PROGRESS_COLUMNS])
+
+
+def progress_values(queryset):
+    """Return ``queryset`` as tuples of the ``PROGRESS_COLUMNS``.
+    """
+    annotations = dict(
+        ('_%s' % name, KeyTransform(source[len('extras:'):], 'extras'))
+        for name, source, t in PROGRESS_COLUMNS if source.startswith('extras:'))
+    fields = ['_%s' % name if source.startswith('extras:') else source
+              for name, source, t in PROGRESS_COLUMNS]
+    return queryset.annotate(**annotations).order_by().values_list(*fields)
+
+
+def export_progress(queryset, path, format='parquet', batch_size=100000):
+    """Write the progress facts of ``queryset`` to a Parquet or Arrow IPC
+    file, one row group (record batch) per ``batch_size`` rows read from
+    a server-side cursor. Returns the number of written rows.
+    """
+    if pa is None:
+        raise ImportError('pyarrow is required to export progress')
+    schema = get_arrow_schema()
+    if format == 'parquet':
+        writer = pq.ParquetWriter(path, schema)
+
+        def write(batch):
+            writer.write_table(pa.Table.from_batches([batch]))
+    else:
+        writer = pa.ipc.new_file(path, schema)
+        write = writer.write_batch
+    rows = progress_values(queryset).iterator()
+    count = 0
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            columns = list(zip(*batch))
+            write(pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type)
+                 for column, field in zip(columns, schema)],
+                schema=schema))
+            count += len(batch)
+    finally:
+        writer.close()
+    return count
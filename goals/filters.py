@@ -1,8 +1,9 @@
 from django import forms
+from django.core.validators import EMPTY_VALUES
 from django.contrib.postgres.forms import SimpleArrayField
 import django_filters
 from .models import (Plan, Goal, Theme, Sector, Target, Indicator, Component,
-                     Progress, Area, AreaType)
+                     Progress, FlatProgress, Area, AreaType)
 
 
 class SimpleIntegerArrayField(SimpleArrayField):
@@ -18,6 +19,16 @@ class IntegerArrayFilter(django_filters.Filter):
     field_class = SimpleIntegerArrayField
 
 
+class ArrayContainsFilter(django_filters.NumberFilter):
+    """Filters integer array fields containing the given value.
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        return super(ArrayContainsFilter, self).filter(qs, [int(value)])
+
+
 class AreaFilter(django_filters.FilterSet):
     name = django_filters.CharFilter(lookup_expr='iexact')
     type = django_filters.CharFilter(lookup_expr='iexact')
@@ -30,6 +41,8 @@ class AreaFilter(django_filters.FilterSet):
 class SectorFilter(django_filters.FilterSet):
     name = django_filters.CharFilter(lookup_expr='iexact')
     description = django_filters.CharFilter(lookup_expr='icontains')
+    plan = ArrayContainsFilter(name='plans_ids', lookup_expr='contains')
+    ancestor = ArrayContainsFilter(name='ancestors_ids', lookup_expr='contains')
 
     class Meta:
         model = Sector
@@ -73,8 +86,10 @@ class IndicatorFilter(django_filters.FilterSet):
     goal = django_filters.ModelChoiceFilter(name='target__goal',
                                             queryset=Goal.objects.all())
     description = django_filters.CharFilter(lookup_expr='icontains')
-    data_source = django_filters.CharFilter(lookup_expr='icontains')
-    agency = django_filters.CharFilter(lookup_expr='iexact')
+    data_source = django_filters.CharFilter(
+        name='components__data_source', lookup_expr='icontains', distinct=True)
+    agency = django_filters.CharFilter(
+        name='components__agency', lookup_expr='iexact', distinct=True)
     progress_count = django_filters.NumberFilter(lookup_expr='gte')
     sectors_ids = IntegerArrayFilter(lookup_expr='contains')
 
@@ -86,8 +101,9 @@ class IndicatorFilter(django_filters.FilterSet):
 class ComponentFilter(django_filters.FilterSet):
     name = django_filters.CharFilter(lookup_expr='icontains')
     description = django_filters.CharFilter(lookup_expr='icontains')
-    goal = django_filters.ModelChoiceFilter(
-        name='indicators__target__goal', queryset=Goal.objects.all())
+    plan = ArrayContainsFilter(name='plans_ids', lookup_expr='contains')
+    goal = ArrayContainsFilter(name='goals_ids', lookup_expr='contains')
+    target = ArrayContainsFilter(name='targets_ids', lookup_expr='contains')
     progress_count = django_filters.NumberFilter(lookup_expr='gte')
 
     class Meta:
@@ -107,6 +123,7 @@ class ProgressFilter(django_filters.FilterSet):
         name='area__type', queryset=AreaType.objects.all())
     area_type_code = django_filters.CharFilter(name='area__type__code')
     area_type_name = django_filters.CharFilter(name='area__type__name')
+    groups = django_filters.CharFilter(method='filter_groups')
 
     class Meta:
         model = Progress
@@ -117,3 +134,32 @@ class ProgressFilter(django_filters.FilterSet):
             'fiscal_year': ['exact', 'lt', 'lte', 'gt', 'gte'],
             'value': ['exact', 'lt', 'lte', 'gt', 'gte']
         }
+
+    def filter_groups(self, queryset, name, value):
+        # Comma separated groups matched exactly
+        groups = [g.strip() for g in value.split(',') if g.strip()]
+        return queryset.filter(groups=groups)
+
+
+class FlatProgressFilter(django_filters.FilterSet):
+    indicator = ArrayContainsFilter(name='indicators_ids', lookup_expr='contains')
+    target = ArrayContainsFilter(name='targets_ids', lookup_expr='contains')
+    goal = ArrayContainsFilter(name='goals_ids', lookup_expr='contains')
+    plan = ArrayContainsFilter(name='plans_ids', lookup_expr='contains')
+    area_type = django_filters.NumberFilter(name='area_type_id')
+
+    class Meta:
+        model = FlatProgress
+        fields = {
+            'component': ['exact'],
+            'component_code': ['exact'],
+            'area': ['exact'],
+            'area_code': ['exact'],
+            'area_name': ['exact'],
+            'area_level': ['exact'],
+            'area_type_code': ['exact'],
+            'area_type_name': ['exact'],
+            'year': ['exact', 'lt', 'lte', 'gt', 'gte'],
+            'fiscal_year': ['exact', 'lt', 'lte', 'gt', 'gte'],
+            'value': ['exact', 'lt', 'lte', 'gt', 'gte']
+        }
@@ -0,0 +1,79 @@
+import time
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import Indicator, Component, Progress
+from .signals import progress_bulk_changed
+
+
+# Generation counters are bumped whenever objects of a model change.
+# Cache keys which include the generations of the models they depend
+# on become unreachable on change, so nothing has to be deleted.
+
+
+def _key(model):
+    return 'goals:generation:%s' % model._meta.label_lower
+
+
+def _initial():
+    # Never restart from a previously used value when a counter
+    # gets evicted from the cache.
+    return int(time.time() * 1000)
+
+
+def get_counter(key):
+    """Return the value of the version counter ``key``.
+    """
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, _initial(), None)
+        value = cache.get(key)
+    return value
+
+
+def bump_counter(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial(), None)
+
+
+def has_generation(model):
+    """Return whether every change of ``model`` objects bumps its
+    generation.
+    """
+    return model._meta.app_label == 'goals'
+
+
+def get_generations(models):
+    keys = [_key(m) for m in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, _initial(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generations(*models):
+    for model in set(models):
+        bump_counter(_key(model))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def model_changed(sender, **kwargs):
+    if has_generation(sender):
+        bump_generations(sender)
+
+
+@receiver(m2m_changed)
+def model_relations_changed(sender, action, **kwargs):
+    if sender._meta.app_label == 'goals' and action.startswith('post_'):
+        bump_generations(sender, kwargs['instance'].__class__, kwargs['model'])
+
+
+@receiver(progress_bulk_changed, sender=Progress)
+def progress_bulk_generations_changed(sender, **kwargs):
+    # Counters of components and indicators are updated too
+    bump_generations(Progress, Component, Indicator)
@@ -1,6 +1,9 @@
 import json
 from import_export import widgets, resources, fields
-from .models import (Area, Goal, Theme, SectorType, Sector, Target, Indicator)
+from .models import (Area, Goal, Theme, SectorType, Sector, Target, Indicator,
+                     Progress)
+from .denormalization import IndicatorDenormalizer
+from .loaders import GROUPS_DELIMITER, PROGRESS_NATURAL_KEY
 
 
 class JSONWidget(widgets.Widget):
@@ -14,6 +17,23 @@ class JSONWidget(widgets.Widget):
         return json.loads(value)
 
 
+class ArrayWidget(widgets.Widget):
+    """
+    Widget for converting separated values of array fields.
+    """
+
+    def __init__(self, separator=','):
+        self.separator = separator
+
+    def clean(self, value, row=None, *args, **kwargs):
+        if not value:
+            return []
+        return [v.strip() for v in value.split(self.separator) if v.strip()]
+
+    def render(self, value, obj=None):
+        return self.separator.join(value or [])
+
+
 class BaseResource(resources.ModelResource):
     extras = fields.Field(attribute='extras', widget=JSONWidget())
 
@@ -55,6 +75,35 @@ class IndicatorResource(BaseResource):
     class Meta:
         model = Indicator
 
+    def get_column_ids(self, dataset, column):
+        if column not in dataset.headers:
+            return []
+        ids = []
+        for value in dataset[column]:
+            try:
+                # Spreadsheets may give numbers like 3.0
+                ids.append(int(float(value)))
+            except (TypeError, ValueError):
+                pass
+        return ids
+
+    def before_import(self, dataset, *args, **kwargs):
+        self.denormalizer = IndicatorDenormalizer(
+            theme_ids=self.get_column_ids(dataset, 'theme'),
+            target_ids=self.get_column_ids(dataset, 'target'),
+            sector_ids=self.get_column_ids(dataset, 'sector'))
+        return super(IndicatorResource, self).before_import(
+            dataset, *args, **kwargs)
+
+    def save_instance(self, instance, using_transactions=True, dry_run=False):
+        self.before_save_instance(instance, using_transactions, dry_run)
+        if not using_transactions and dry_run:
+            # we don't have transactions and we want to do a dry_run
+            pass
+        else:
+            instance.save(denormalizer=self.denormalizer)
+        self.after_save_instance(instance, using_transactions, dry_run)
+
 
 class AreaResource(BaseResource):
     parent = fields.Field(
@@ -62,3 +111,28 @@ class AreaResource(BaseResource):
 
     class Meta:
         model = Area
+
+
+class ProgressResource(BaseResource):
+    groups = fields.Field(attribute='groups',
+                          widget=ArrayWidget(separator=GROUPS_DELIMITER))
+
+    class Meta:
+        model = Progress
+        # Rows with an existing natural key update it
+        import_id_fields = PROGRESS_NATURAL_KEY
+
+    def get_instance(self, instance_loader, row):
+        # Missing key columns, e.g. groups, match their default value
+        params = {}
+        for key in self.get_import_id_fields():
+            field = self.fields[key]
+            if field.column_name in row:
+                params[field.attribute] = field.clean(row)
+            else:
+                params[field.attribute] = Progress._meta\
+                    .get_field(field.attribute).get_default()
+        try:
+            return instance_loader.get_queryset().get(**params)
+        except Progress.DoesNotExist:
+            return None
@@ -0,0 +1,405 @@
+import csv
+import io
+import math
+from django.conf import settings
+from django.db import connection, transaction, DatabaseError
+from django.utils import timezone
+from django.utils.encoding import force_text
+from .models import Area, Component, Progress
+from .signals import progress_bulk_changed
+
+
+# Progress fields identifying a row, backed by the unique index
+# goals_progress_natural_key. Changing it requires a matching index.
+PROGRESS_NATURAL_KEY = tuple(getattr(
+    settings, 'GOALS_PROGRESS_NATURAL_KEY',
+    ('component', 'area', 'year', 'fiscal_year', 'groups')))
+
+
+# Separator of the groups of a progress row in imported files
+GROUPS_DELIMITER = ';'
+
+
+def _quote(value):
+    return '"%s"' % force_text(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def to_hstore_literal(data):
+    return ', '.join('%s=>%s' % (_quote(k), 'NULL' if v is None else _quote(v))
+                     for k, v in data.items())
+
+
+def to_array_literal(values):
+    return '{%s}' % ','.join(_quote(v) for v in values)
+
+
+def get_progress_extras(area, component):
+    """Denormalised extras of a progress row, see ``Progress.save()``
+    """
+    return {
+        'area_code': area.code,
+        'area_name': area.name,
+        'area_type_id': str(area.type_id),
+        'area_type_code': area.type.code,
+        'area_type_name': area.type.name,
+        'component_code': component.code,
+        'component_name': component.name,
+        'value_unit': component.value_unit,
+    }
+
+
+# Valid progress years, checked before writing so a single row can't
+# fail a whole batch
+MIN_YEAR, MAX_YEAR = 0, 9999
+
+
+class RowError(Exception):
+    pass
+
+
+def clean_progress_values(row, groups):
+    """Validate and convert the plain values of a progress row.
+    """
+    year = row.get('year')
+    try:
+        if isinstance(year, bool) or isinstance(year, float) and not year.is_integer():
+            raise ValueError
+        year = int(year)
+        if not MIN_YEAR <= year <= MAX_YEAR:
+            raise ValueError
+    except (TypeError, ValueError):
+        raise RowError('Invalid year "%s"' % row.get('year'))
+    value = row.get('value')
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        value = float(value)
+        if math.isnan(value) or math.isinf(value):
+            raise ValueError
+    except (TypeError, ValueError):
+        raise RowError('Invalid value "%s"' % row.get('value'))
+    fiscal_year = force_text(row.get('fiscal_year') or '').strip()
+    if len(fiscal_year) > Progress._meta.get_field('fiscal_year').max_length:
+        raise RowError('Invalid fiscal year "%s"' % fiscal_year)
+    groups = [force_text(g).strip() for g in groups or [] if force_text(g).strip()]
+    if any(len(g) > 50 for g in groups):
+        raise RowError('Group names can not exceed 50 characters')
+    return {
+        'groups': groups,
+        'year': year,
+        'fiscal_year': fiscal_year,
+        'value': value,
+        'remarks': force_text(row.get('remarks') or '').strip(),
+    }
+
+
+class ProgressLoader(object):
+    """Loads progress rows in bulk using PostgreSQL ``COPY``. Rows
+    with the natural key of an existing row update it.
+
+    Areas and components are referenced by their codes and resolved
+    from in-memory maps. Invalid rows are collected in ``errors``
+    and skipped without aborting the load.
+    """
+    columns = ('component_id', 'area_id', 'groups', 'year', 'fiscal_year',
+               'value', 'remarks', 'created', 'last_modified', 'extras')
+    groups_delimiter = GROUPS_DELIMITER
+
+    def __init__(self, batch_size=10000):
+        self.batch_size = batch_size
+        self.areas = dict(
+            (a.code, a) for a in Area.objects.select_related('type'))
+        self.components = dict(
+            (c.code, c) for c in Component.objects.all())
+        self.errors = []
+        self.loaded = 0
+        self.area_ids = set()
+        self.component_ids = set()
+
+    def clean_row(self, row):
+        area = self.areas.get((row.get('area') or '').strip())
+        if area is None:
+            raise RowError('Unknown area code "%s"' % row.get('area'))
+        component = self.components.get((row.get('component') or '').strip())
+        if component is None:
+            raise RowError('Unknown component code "%s"' % row.get('component'))
+        groups = (row.get('groups') or '').split(self.groups_delimiter)
+        data = clean_progress_values(row, groups)
+        data['area'] = area
+        data['component'] = component
+        return data
+
+    def get_copy_row(self, data, now):
+        return [
+            data['component'].id,
+            data['area'].id,
+            to_array_literal(data['groups']),
+            data['year'],
+            data['fiscal_year'],
+            repr(data['value']),
+            data['remarks'],
+            now,
+            now,
+            to_hstore_literal(get_progress_extras(data['area'], data['component'])),
+        ]
+
+    def copy(self, rows):
+        """COPY ``rows`` into a temporary table and upsert them from
+        there, so reloading a file updates the existing rows.
+        """
+        buf = io.StringIO()
+        csv.writer(buf, quoting=csv.QUOTE_ALL).writerows(rows)
+        buf.seek(0)
+        columns = ', '.join(self.columns)
+        key = ', '.join(get_natural_key_columns())
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE progress_load AS '
+                'SELECT %s FROM %s WITH NO DATA' % (columns, Progress._meta.db_table))
+            cursor.copy_expert(
+                'COPY progress_load (%s) FROM STDIN WITH (FORMAT csv)' % columns, buf)
+            # The last row of a natural key in the file wins
+            cursor.execute(get_upsert_sql(
+                'SELECT DISTINCT ON (%s) %s FROM progress_load '
+                'ORDER BY %s, ctid DESC' % (key, columns, key)))
+            cursor.execute('DROP TABLE progress_load')
+
+    def flush(self, batch, linenos):
+        try:
+            self.copy(batch)
+        except DatabaseError as e:
+            self.errors.append(
+                ('%d-%d' % (linenos[0], linenos[-1]), 'Batch failed: %s' % e))
+        else:
+            self.loaded += len(batch)
+
+    def load(self, rows, start=1):
+        """Load an iterable of dicts, ``start`` is the number of the
+        first row used for error reporting.
+        """
+        now = timezone.now().isoformat()
+        batch, linenos = [], []
+        for lineno, row in enumerate(rows, start):
+            try:
+                data = self.clean_row(row)
+            except RowError as e:
+                self.errors.append((lineno, str(e)))
+                continue
+            batch.append(self.get_copy_row(data, now))
+            linenos.append(lineno)
+            self.area_ids.add(data['area'].id)
+            self.component_ids.add(data['component'].id)
+            if len(batch) >= self.batch_size:
+                self.flush(batch, linenos)
+                batch, linenos = [], []
+        if batch:
+            self.flush(batch, linenos)
+        progress_bulk_changed.send(
+            sender=Progress, area_ids=self.area_ids,
+            component_ids=self.component_ids)
+        return self.loaded
+
+
+def get_natural_key(data):
+    """Return the natural key of cleaned progress ``data``.
+    """
+    key = []
+    for name in PROGRESS_NATURAL_KEY:
+        value = data[name]
+        if name in ('component', 'area'):
+            value = value.id
+        elif name == 'groups':
+            value = tuple(value or [])
+        key.append(value)
+    return tuple(key)
+
+
+def get_natural_key_columns():
+    return [Progress._meta.get_field(name).column for name in PROGRESS_NATURAL_KEY]
+
+
+def get_upsert_sql(source):
+    """Return an ``INSERT ... ON CONFLICT`` statement inserting
+    ``source`` (the rest of the statement after the column list) and
+    updating rows with an existing natural key instead.
+    """
+    return 'INSERT INTO {table} AS p ({columns}) {source} ' \
+           'ON CONFLICT ({key}) DO UPDATE SET value = EXCLUDED.value, ' \
+           'remarks = EXCLUDED.remarks, ' \
+           'extras = COALESCE(p.extras, \'\'::hstore) || EXCLUDED.extras, ' \
+           'last_modified = EXCLUDED.last_modified'.format(
+               table=connection.ops.quote_name(Progress._meta.db_table),
+               columns=', '.join(ProgressLoader.columns),
+               source=source,
+               key=', '.join(get_natural_key_columns()))
+
+
+def iter_duplicate_progress():
+    """Yield lists of ids of progress rows sharing a natural key,
+    the most recently modified first. Uses a server-side cursor.
+    """
+    sql = 'SELECT array_agg(id ORDER BY last_modified DESC, id DESC) ' \
+          'FROM {table} GROUP BY {key} HAVING COUNT(*) > 1'.format(
+              table=connection.ops.quote_name(Progress._meta.db_table),
+              key=', '.join(get_natural_key_columns()))
+    with transaction.atomic():
+        cursor = connection.chunked_cursor()
+        try:
+            cursor.execute(sql)
+            for ids, in cursor:
+                yield ids
+        finally:
+            cursor.close()
+
+
+def delete_duplicate_progress(batch_size=10000, dry_run=False):
+    """Delete all but the most recently modified progress row of
+    every natural key. Returns the number of (to be) deleted rows.
+    """
+    batch, deleted = [], 0
+    area_ids, component_ids = set(), set()
+
+    def flush():
+        # Skip per row delete signals, progress_bulk_changed is sent once
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM %s WHERE id = ANY(%%s) RETURNING area_id, component_id'
+                % connection.ops.quote_name(Progress._meta.db_table), [batch])
+            for area_id, component_id in cursor.fetchall():
+                area_ids.add(area_id)
+                component_ids.add(component_id)
+
+    for ids in iter_duplicate_progress():
+        deleted += len(ids) - 1
+        if dry_run:
+            continue
+        batch.extend(ids[1:])
+        if len(batch) >= batch_size:
+            flush()
+            batch = []
+    if batch:
+        flush()
+    if deleted and not dry_run:
+        progress_bulk_changed.send(
+            sender=Progress, area_ids=area_ids, component_ids=component_ids)
+    return deleted
+
+
+class ProgressBulkWriter(object):
+    """Creates or updates many progress rows matched on their natural
+    key (``GOALS_PROGRESS_NATURAL_KEY``).
+
+    Areas and components are each fetched with a single ``IN`` query
+    and rows are written with ``INSERT ... ON CONFLICT DO UPDATE``
+    statements of ``batch_size`` rows. ``results`` holds the status
+    of every item.
+    """
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.results = []
+        self.failed_batches = []
+        self.area_ids = set()
+        self.component_ids = set()
+
+    def get_id(self, item, name):
+        value = item.get(name)
+        # bool is a subclass of int
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+
+    def get_ids(self, items, name):
+        return set(self.get_id(i, name) for i in items
+                   if isinstance(i, dict) and self.get_id(i, name) is not None)
+
+    def clean(self, items):
+        areas = Area.objects.select_related('type').in_bulk(
+            self.get_ids(items, 'area'))
+        components = Component.objects.in_bulk(
+            self.get_ids(items, 'component'))
+        cleaned, keys = {}, {}
+        for index, item in enumerate(items):
+            try:
+                if not isinstance(item, dict):
+                    raise RowError('Expected an object')
+                area = areas.get(self.get_id(item, 'area'))
+                if area is None:
+                    raise RowError('Unknown area "%s"' % item.get('area'))
+                component = components.get(self.get_id(item, 'component'))
+                if component is None:
+                    raise RowError('Unknown component "%s"' % item.get('component'))
+                groups = item.get('groups') or []
+                if not isinstance(groups, list):
+                    raise RowError('Groups must be a list')
+                data = clean_progress_values(item, groups)
+                data['area'] = area
+                data['component'] = component
+                key = get_natural_key(data)
+                if key in keys:
+                    raise RowError('Duplicate of item %d' % keys[key])
+            except RowError as e:
+                self.results.append({'index': index, 'status': 'error', 'error': str(e)})
+                continue
+            keys[key] = index
+            cleaned[index] = data
+        return cleaned
+
+    def upsert(self, batch, now):
+        """Upsert ``batch``, a list of ``(index, data)``, and record
+        the status of every item. A batch failing in the database is
+        rolled back alone and its item indexes are added to
+        ``failed_batches``.
+        """
+        placeholders = '(%s, %s, %s::varchar(50)[], %s, %s, %s, %s, %s, %s, %s::hstore)'
+        sql = get_upsert_sql('VALUES %s' % ', '.join([placeholders] * len(batch)))
+        sql += ' RETURNING p.id, p.xmax = 0, %s' % ', '.join(
+            'p.%s' % c for c in get_natural_key_columns())
+        params = []
+        for index, data in batch:
+            params.extend([
+                data['component'].id, data['area'].id, data['groups'],
+                data['year'], data['fiscal_year'], data['value'],
+                data['remarks'], now, now,
+                get_progress_extras(data['area'], data['component'])])
+        indexes = dict((get_natural_key(data), index) for index, data in batch)
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+        except DatabaseError as e:
+            self.failed_batches.append('%d-%d' % (batch[0][0], batch[-1][0]))
+            self.results.extend(
+                {'index': index, 'status': 'error', 'error': 'Batch failed: %s' % e}
+                for index, data in batch)
+            return
+        for row in rows:
+            pk, inserted, key = row[0], row[1], list(row[2:])
+            if 'groups' in PROGRESS_NATURAL_KEY:
+                position = PROGRESS_NATURAL_KEY.index('groups')
+                key[position] = tuple(key[position] or [])
+            self.results.append({
+                'index': indexes[tuple(key)],
+                'status': 'created' if inserted else 'updated',
+                'id': pk,
+            })
+
+    def write(self, items):
+        """Create or update ``items``, a list of dicts with component
+        and area ids, year, value and optionally fiscal_year, groups
+        and remarks. Returns ``results``.
+        """
+        cleaned = sorted(self.clean(items).items())
+        now = timezone.now()
+        for i in range(0, len(cleaned), self.batch_size):
+            self.upsert(cleaned[i:i + self.batch_size], now)
+        written = set(r['index'] for r in self.results if 'id' in r)
+        for index, data in cleaned:
+            if index in written:
+                self.area_ids.add(data['area'].id)
+                self.component_ids.add(data['component'].id)
+        self.results.sort(key=lambda r: r['index'])
+        if written:
+            progress_bulk_changed.send(
+                sender=Progress, area_ids=self.area_ids,
+                component_ids=self.component_ids)
+        return self.results
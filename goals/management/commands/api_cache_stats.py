@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.core.urlresolvers import get_resolver
+from goals.api.mixins import get_cache_metrics, reset_cache_metrics
+
+
+def iter_view_names(patterns):
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            for name in iter_view_names(pattern.url_patterns):
+                yield name
+        else:
+            # Class based views set the view class on the callback
+            cls = getattr(pattern.callback, 'cls', None)
+            if cls is not None:
+                yield cls.__name__
+
+
+class Command(BaseCommand):
+    help = 'Show the response cache hits, misses and hit rate of the API views.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('views', nargs='*',
+                            help='View class names, all API views by default')
+        parser.add_argument('--reset', action='store_true', default=False,
+                            help='Reset the counters after showing them')
+
+    def handle(self, *args, **options):
+        names = options['views'] or sorted(set(iter_view_names(get_resolver().url_patterns)))
+        for name in names:
+            metrics = get_cache_metrics(name)
+            if options['views'] or metrics['hit'] or metrics['miss']:
+                rate = '-' if metrics['rate'] is None else '%.1f%%' % (metrics['rate'] * 100)
+                self.stdout.write('%s: %d hits, %d misses, hit rate %s' % (
+                    name, metrics['hit'], metrics['miss'], rate))
+            if options['reset']:
+                reset_cache_metrics(name)
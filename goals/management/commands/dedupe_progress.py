@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from goals.loaders import PROGRESS_NATURAL_KEY, delete_duplicate_progress
+
+
+class Command(BaseCommand):
+    help = 'Delete progress rows sharing a natural key (%s), keeping ' \
+           'the most recently modified one.' % ', '.join(PROGRESS_NATURAL_KEY)
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='Number of rows per DELETE statement')
+        parser.add_argument('--dry-run', action='store_true', default=False,
+                            help='Only count the duplicates')
+
+    def handle(self, *args, **options):
+        count = delete_duplicate_progress(batch_size=options['batch_size'],
+                                          dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write('Found %d duplicate progress rows' % count)
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                'Deleted %d duplicate progress rows' % count))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from goals.exporters import FORMATS, export_progress, pa
+from goals.filters import ProgressFilter
+from goals.models import Progress
+
+
+class Command(BaseCommand):
+    help = 'Export progress with its denormalised area and component ' \
+           'fields to a Parquet or Arrow IPC file. Requires pyarrow.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Path of the output file')
+        parser.add_argument('--format', choices=FORMATS, default='parquet')
+        parser.add_argument('--batch-size', type=int, default=100000,
+                            help='Number of rows per row group')
+        parser.add_argument('--filter', action='append', default=[],
+                            metavar='PARAM=VALUE',
+                            help='Progress API filter, e.g. year__gte=2000. '
+                                 'Can be given multiple times')
+
+    def handle(self, *args, **options):
+        if pa is None:
+            raise CommandError('pyarrow is required, install it with '
+                               '"pip install pyarrow"')
+        data = {}
+        for param in options['filter']:
+            name, sep, value = param.partition('=')
+            if not sep:
+                raise CommandError('Invalid filter "%s", use PARAM=VALUE' % param)
+            data[name] = value
+        filterset = ProgressFilter(data, queryset=Progress.objects.all())
+        if not filterset.is_valid():
+            raise CommandError(filterset.errors.as_text())
+        count = export_progress(filterset.qs, options['file'],
+                                format=options['format'],
+                                batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            'Exported %d progress rows to %s' % (count, options['file'])))
@@ -0,0 +1,30 @@
+import csv
+from django.core.management.base import BaseCommand
+from goals.loaders import GROUPS_DELIMITER, ProgressLoader
+
+
+class Command(BaseCommand):
+    help = 'Bulk load progress values from a CSV file with the columns ' \
+           'component, area, year, value and optionally fiscal_year, ' \
+           'groups ("%s" separated) and remarks. Components and areas ' \
+           'are referenced by their codes.' % GROUPS_DELIMITER
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Path to the CSV file')
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='Number of rows per COPY statement')
+        parser.add_argument('--delimiter', default=',',
+                            help='CSV field delimiter')
+        parser.add_argument('--encoding', default='utf-8')
+
+    def handle(self, *args, **options):
+        loader = ProgressLoader(batch_size=options['batch_size'])
+        with open(options['file'], encoding=options['encoding'], newline='') as f:
+            reader = csv.DictReader(f, delimiter=options['delimiter'])
+            # Line 1 is the header
+            loader.load(reader, start=2)
+        for lineno, message in loader.errors:
+            self.stderr.write('Line %s: %s' % (lineno, message))
+        self.stdout.write(self.style.SUCCESS(
+            'Loaded %d progress rows, %d errors'
+            % (loader.loaded, len(loader.errors))))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from goals.models import Indicator
+from goals.denormalization import recompute_indicators
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalised fields of indicators in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int,
+                            help='Only recompute indicators with these ids')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        queryset = Indicator.objects.all()
+        if options['ids']:
+            queryset = queryset.filter(id__in=options['ids'])
+        updated, errors = recompute_indicators(
+            queryset, batch_size=options['batch_size'])
+        for indicator_id, error in errors:
+            self.stderr.write('Indicator %d: %s' % (indicator_id, '; '.join(error.messages)))
+        self.stdout.write(self.style.SUCCESS(
+            'Updated %d indicators, %d failed' % (updated, len(errors))))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from goals.counters import refresh_progress_counts
+
+
+class Command(BaseCommand):
+    help = 'Recount the progress_count of components and indicators.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('component_ids', nargs='*', type=int,
+                            help='Only recount these components and their indicators')
+
+    def handle(self, *args, **options):
+        refresh_progress_counts(options['component_ids'] or None)
+        self.stdout.write(self.style.SUCCESS('Progress counts refreshed'))
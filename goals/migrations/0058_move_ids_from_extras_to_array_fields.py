@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+ARRAY_FIELDS = (
+    ('Sector', ('ancestors_ids', 'plans_ids')),
+    ('Component', ('targets_ids', 'goals_ids', 'plans_ids')),
+)
+
+
+def move_ids_from_extras(apps, schema_editor):
+    """Move JSON encoded id lists from extras to array fields
+    """
+    for model_name, fields in ARRAY_FIELDS:
+        Model = apps.get_model('goals', model_name)
+        for obj in Model.objects.iterator():
+            extras = obj.extras or {}
+            values = dict((f, json.loads(extras.pop(f, None) or '[]'))
+                          for f in fields)
+            if model_name == 'Sector':
+                values['ancestors_ids'] = list(
+                    Model.objects.filter(tree_id=obj.tree_id, lft__lt=obj.lft, rght__gt=obj.rght)
+                    .order_by('lft').values_list('id', flat=True))
+            Model.objects.filter(pk=obj.pk).update(extras=extras, **values)
+
+
+def move_ids_to_extras(apps, schema_editor):
+    for model_name, fields in ARRAY_FIELDS:
+        Model = apps.get_model('goals', model_name)
+        for obj in Model.objects.iterator():
+            extras = obj.extras or {}
+            for f in fields:
+                extras[f] = json.dumps(getattr(obj, f) or [])
+            Model.objects.filter(pk=obj.pk).update(extras=extras)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0057_add_field_plan_id_to_indicator'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sector',
+            name='ancestors_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=[], editable=False, null=True, size=None, verbose_name='Ancestors ids'),
+        ),
+        migrations.AddField(
+            model_name='sector',
+            name='plans_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=[], editable=False, null=True, size=None, verbose_name='Plans ids'),
+        ),
+        migrations.AddField(
+            model_name='component',
+            name='targets_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=[], editable=False, null=True, size=None, verbose_name='Targets ids'),
+        ),
+        migrations.AddField(
+            model_name='component',
+            name='goals_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=[], editable=False, null=True, size=None, verbose_name='Goals ids'),
+        ),
+        migrations.AddField(
+            model_name='component',
+            name='plans_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=[], editable=False, null=True, size=None, verbose_name='Plans ids'),
+        ),
+        migrations.RunPython(move_ids_from_extras, reverse_code=move_ids_to_extras),
+        migrations.AddIndex(
+            model_name='sector',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['ancestors_ids'], name='goals_sector_ancestors_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='sector',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['plans_ids'], name='goals_sector_plans_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='indicator',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['sectors_ids'], name='goals_indicator_sectors_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='component',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['targets_ids'], name='goals_component_targets_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='component',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['goals_ids'], name='goals_component_goals_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='component',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['plans_ids'], name='goals_component_plans_gin'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# Columns filtered with icontains, including modeltranslation columns.
+# The index expression matches the UPPER("column"::text) LIKE UPPER(...)
+# SQL generated by Django for icontains lookups.
+TRIGRAM_COLUMNS = (
+    ('goals_theme', 'description'),
+    ('goals_goal', 'description'),
+    ('goals_sector', 'description'),
+    ('goals_target', 'description'),
+    ('goals_indicator', 'description'),
+    ('goals_component', 'name'),
+    ('goals_component', 'description'),
+    ('goals_component', 'data_source'),
+)
+
+LANGUAGE_SUFFIXES = ('', '_en', '_sw')
+
+
+def trigram_index_sql():
+    sql, reverse_sql = [], []
+    for table, column in TRIGRAM_COLUMNS:
+        for suffix in LANGUAGE_SUFFIXES:
+            name = '%s_%s%s_trgm' % (table, column, suffix)
+            sql.append(
+                'CREATE INDEX %s ON %s USING gin (UPPER(%s%s::text) gin_trgm_ops);'
+                % (name, table, column, suffix))
+            reverse_sql.append('DROP INDEX IF EXISTS %s;' % name)
+    return sql, reverse_sql
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0058_move_ids_from_extras_to_array_fields'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(*trigram_index_sql()),
+    ]
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+COUNT_PROGRESS_SQL = """
+UPDATE goals_component c
+SET progress_count = (
+    SELECT COUNT(*) FROM goals_progress p WHERE p.component_id = c.id);
+
+UPDATE goals_indicator i
+SET progress_count = (
+    SELECT COUNT(*) FROM goals_progress p
+    JOIN goals_component_indicators ci ON ci.component_id = p.component_id
+    WHERE ci.indicator_id = i.id);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0059_add_trigram_indexes_for_text_filters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='component',
+            name='progress_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='Progress count'),
+        ),
+        migrations.AddField(
+            model_name='indicator',
+            name='progress_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='Progress count'),
+        ),
+        migrations.RunSQL(COUNT_PROGRESS_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
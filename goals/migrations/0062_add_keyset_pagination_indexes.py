@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0061_add_index_component_year_on_progress'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='progress',
+            index=models.Index(fields=['-year', 'id'], name='goals_progress_year_id'),
+        ),
+        migrations.AddIndex(
+            model_name='indicator',
+            index=models.Index(fields=['code', 'id'], name='goals_indicator_code_id'),
+        ),
+        migrations.AddIndex(
+            model_name='component',
+            index=models.Index(fields=['code', 'id'], name='goals_component_code_id'),
+        ),
+    ]
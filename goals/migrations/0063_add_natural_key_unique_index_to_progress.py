@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+# Deleting duplicates fires no signals, recount like 0060 does
+COUNT_PROGRESS_SQL = """
+UPDATE goals_component c
+SET progress_count = (
+    SELECT COUNT(*) FROM goals_progress p WHERE p.component_id = c.id);
+
+UPDATE goals_indicator i
+SET progress_count = (
+    SELECT COUNT(*) FROM goals_progress p
+    JOIN goals_component_indicators ci ON ci.component_id = p.component_id
+    WHERE ci.indicator_id = i.id);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0062_add_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        # NULL groups would never conflict in a unique index
+        migrations.RunSQL(
+            "UPDATE goals_progress SET groups = '{}' WHERE groups IS NULL",
+            migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name='progress',
+            name='groups',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(blank=True, max_length=50), blank=True, default=[], size=None, verbose_name='Groups'),
+        ),
+        # Keep the most recently modified row of every natural key.
+        # Use the dedupe_progress command beforehand to review large
+        # amounts of duplicates.
+        migrations.RunSQL(
+            """
+            DELETE FROM goals_progress p USING (
+                SELECT id, row_number() OVER (
+                    PARTITION BY component_id, area_id, year, fiscal_year, groups
+                    ORDER BY last_modified DESC, id DESC) AS position
+                FROM goals_progress
+            ) d
+            WHERE p.id = d.id AND d.position > 1
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(COUNT_PROGRESS_SQL, reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX goals_progress_natural_key ON goals_progress '
+            '(component_id, area_id, year, fiscal_year, groups)',
+            'DROP INDEX goals_progress_natural_key',
+        ),
+    ]
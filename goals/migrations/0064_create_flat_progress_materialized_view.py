@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+CREATE_VIEW = """
+CREATE MATERIALIZED VIEW goals_flatprogress AS
+SELECT
+    p.id,
+    p.component_id,
+    c.code AS component_code,
+    c.name AS component_name,
+    c.value_unit,
+    p.area_id,
+    a.code AS area_code,
+    a.name AS area_name,
+    a.level AS area_level,
+    a.type_id AS area_type_id,
+    t.code AS area_type_code,
+    t.name AS area_type_name,
+    COALESCE(p.groups, '{}') AS groups,
+    p.year,
+    p.fiscal_year,
+    p.value,
+    p.remarks,
+    COALESCE(ci.indicators_ids, '{}') AS indicators_ids,
+    COALESCE(ci.targets_ids, '{}') AS targets_ids,
+    COALESCE(ci.goals_ids, '{}') AS goals_ids,
+    COALESCE(ci.plans_ids, '{}') AS plans_ids,
+    p.created,
+    GREATEST(p.last_modified, c.last_modified, a.last_modified,
+             t.last_modified) AS last_modified
+FROM goals_progress p
+JOIN goals_component c ON c.id = p.component_id
+JOIN goals_area a ON a.id = p.area_id
+JOIN goals_areatype t ON t.id = a.type_id
+LEFT JOIN (
+    SELECT
+        x.component_id,
+        array_agg(DISTINCT i.id) AS indicators_ids,
+        array_agg(DISTINCT i.target_id) FILTER (WHERE i.target_id IS NOT NULL) AS targets_ids,
+        array_agg(DISTINCT g.id) FILTER (WHERE g.id IS NOT NULL) AS goals_ids,
+        array_agg(DISTINCT i.plan_id) FILTER (WHERE i.plan_id IS NOT NULL) AS plans_ids
+    FROM goals_component_indicators x
+    JOIN goals_indicator i ON i.id = x.indicator_id
+    LEFT JOIN goals_target tg ON tg.id = i.target_id
+    LEFT JOIN goals_goal g ON g.id = tg.goal_id
+    GROUP BY x.component_id
+) ci ON ci.component_id = p.component_id
+WITH DATA;
+
+-- Required by REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX goals_flatprogress_id ON goals_flatprogress (id);
+CREATE INDEX goals_flatprogress_year_id ON goals_flatprogress (year DESC, id);
+CREATE INDEX goals_flatprogress_component_year ON goals_flatprogress (component_id, year DESC);
+CREATE INDEX goals_flatprogress_area ON goals_flatprogress (area_id);
+CREATE INDEX goals_flatprogress_area_type_code ON goals_flatprogress (area_type_code);
+CREATE INDEX goals_flatprogress_indicators_gin ON goals_flatprogress USING gin (indicators_ids);
+CREATE INDEX goals_flatprogress_targets_gin ON goals_flatprogress USING gin (targets_ids);
+CREATE INDEX goals_flatprogress_goals_gin ON goals_flatprogress USING gin (goals_ids);
+CREATE INDEX goals_flatprogress_plans_gin ON goals_flatprogress USING gin (plans_ids);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0063_add_natural_key_unique_index_to_progress'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_VIEW, 'DROP MATERIALIZED VIEW goals_flatprogress'),
+        migrations.CreateModel(
+            name='FlatProgress',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('component_code', models.CharField(max_length=10)),
+                ('component_name', models.CharField(max_length=255)),
+                ('value_unit', models.CharField(blank=True, max_length=50)),
+                ('area_code', models.CharField(max_length=20)),
+                ('area_name', models.CharField(max_length=255)),
+                ('area_level', models.PositiveIntegerField()),
+                ('area_type_id', models.IntegerField()),
+                ('area_type_code', models.CharField(max_length=20)),
+                ('area_type_name', models.CharField(max_length=255)),
+                ('groups', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=50), size=None)),
+                ('year', models.PositiveIntegerField()),
+                ('fiscal_year', models.CharField(max_length=9)),
+                ('value', models.FloatField()),
+                ('remarks', models.TextField()),
+                ('indicators_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), size=None)),
+                ('targets_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), size=None)),
+                ('goals_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), size=None)),
+                ('plans_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), size=None)),
+                ('created', models.DateTimeField()),
+                ('last_modified', models.DateTimeField()),
+                ('area', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='goals.Area')),
+                ('component', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='goals.Component')),
+            ],
+            options={
+                'verbose_name': 'Flat progress',
+                'verbose_name_plural': 'Flat progress',
+                'db_table': 'goals_flatprogress',
+                'managed': False,
+            },
+        ),
+    ]
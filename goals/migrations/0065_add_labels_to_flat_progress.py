@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import importlib
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+PREVIOUS_VIEW = importlib.import_module(
+    'goals.migrations.0064_create_flat_progress_materialized_view').CREATE_VIEW
+
+# Ids, codes and names of the objects related to every component,
+# ordered by id so that the arrays line up.
+LABELS_JOIN = """
+LEFT JOIN (
+    SELECT
+        component_id,
+        array_agg(id ORDER BY id) AS ids,
+        array_agg(code ORDER BY id) AS codes,
+        array_agg(name ORDER BY id) AS names
+    FROM (
+        SELECT DISTINCT x.component_id, {table}.id, {table}.code, {table}.name
+        FROM goals_component_indicators x
+        JOIN goals_indicator i ON i.id = x.indicator_id
+        {joins}
+    ) d
+    GROUP BY component_id
+) {alias} ON {alias}.component_id = p.component_id
+"""
+
+LABELS = [
+    ('indicators', 'i', ''),
+    ('targets', 'tg', 'JOIN goals_target tg ON tg.id = i.target_id'),
+    ('goals', 'g', 'JOIN goals_target tg ON tg.id = i.target_id '
+                   'JOIN goals_goal g ON g.id = tg.goal_id'),
+    ('plans', 'pl', 'JOIN goals_plan pl ON pl.id = i.plan_id'),
+]
+
+LABELS_COLUMNS = ''.join(
+    """
+    COALESCE({name}.ids, '{{}}') AS {name}_ids,
+    COALESCE({name}.codes, '{{}}') AS {name}_codes,
+    COALESCE({name}.names, '{{}}') AS {name}_names,""".format(name=name)
+    for name, table, joins in LABELS)
+
+LABELS_JOINS = ''.join(
+    LABELS_JOIN.format(alias=name, table=table, joins=joins)
+    for name, table, joins in LABELS)
+
+CREATE_VIEW = """
+CREATE MATERIALIZED VIEW goals_flatprogress AS
+SELECT
+    p.id,
+    p.component_id,
+    c.code AS component_code,
+    c.name AS component_name,
+    c.value_unit,
+    p.area_id,
+    a.code AS area_code,
+    a.name AS area_name,
+    a.level AS area_level,
+    a.type_id AS area_type_id,
+    t.code AS area_type_code,
+    t.name AS area_type_name,
+    p.groups,
+    p.year,
+    p.fiscal_year,
+    p.value,
+    p.remarks,%s
+    p.created,
+    GREATEST(p.last_modified, c.last_modified, a.last_modified,
+             t.last_modified) AS last_modified
+FROM goals_progress p
+JOIN goals_component c ON c.id = p.component_id
+JOIN goals_area a ON a.id = p.area_id
+JOIN goals_areatype t ON t.id = a.type_id
+%s
+WITH DATA;
+
+-- Required by REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX goals_flatprogress_id ON goals_flatprogress (id);
+CREATE INDEX goals_flatprogress_year_id ON goals_flatprogress (year DESC, id);
+CREATE INDEX goals_flatprogress_component_year ON goals_flatprogress (component_id, year DESC);
+CREATE INDEX goals_flatprogress_area ON goals_flatprogress (area_id);
+CREATE INDEX goals_flatprogress_area_type_code ON goals_flatprogress (area_type_code);
+CREATE INDEX goals_flatprogress_indicators_gin ON goals_flatprogress USING gin (indicators_ids);
+CREATE INDEX goals_flatprogress_targets_gin ON goals_flatprogress USING gin (targets_ids);
+CREATE INDEX goals_flatprogress_goals_gin ON goals_flatprogress USING gin (goals_ids);
+CREATE INDEX goals_flatprogress_plans_gin ON goals_flatprogress USING gin (plans_ids);
+""" % (LABELS_COLUMNS, LABELS_JOINS)
+
+DROP_VIEW = 'DROP MATERIALIZED VIEW goals_flatprogress'
+
+
+def codes_field():
+    return django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=10), size=None)
+
+
+def names_field():
+    return django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), size=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0064_create_flat_progress_materialized_view'),
+    ]
+
+    operations = [
+        migrations.RunSQL([DROP_VIEW, CREATE_VIEW], [DROP_VIEW, PREVIOUS_VIEW]),
+    ] + [
+        operation
+        for name, table, joins in LABELS
+        for operation in [
+            migrations.AddField(
+                model_name='flatprogress',
+                name='%s_codes' % name,
+                field=codes_field(),
+            ),
+            migrations.AddField(
+                model_name='flatprogress',
+                name='%s_names' % name,
+                field=names_field(),
+            ),
+        ]
+    ]
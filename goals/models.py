@@ -1,9 +1,11 @@
 import json
 from django.db import models
-from django.db.models.signals import m2m_changed
+from django.db.models.signals import m2m_changed, pre_delete, post_delete
 from django.dispatch import receiver
 from django.core.exceptions import ValidationError
 from django.contrib.postgres.fields import HStoreField, ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from django.template.defaultfilters import slugify, truncatechars
 from django.utils.functional import cached_property
@@ -73,6 +75,13 @@ class Area(MPTTModel):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(Area, cls).from_db(db, field_names, values)
+        # Keep the loaded parent to detect moved areas after saving
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = self.get_slug()
@@ -156,10 +165,20 @@ class Sector(MPTTModel):
     last_modified = models.DateTimeField(_('Last modified'),
                                          auto_now=True)
     extras = HStoreField(_('Extras'), blank=True, null=True, default={})
+    ancestors_ids = ArrayField(
+        models.IntegerField(), null=True, blank=True, editable=False,
+        verbose_name=_('Ancestors ids'), default=[])
+    plans_ids = ArrayField(
+        models.IntegerField(), null=True, blank=True, editable=False,
+        verbose_name=_('Plans ids'), default=[])
 
     class Meta:
         verbose_name = _('Sector')
         verbose_name_plural = _('Sectors')
+        indexes = [
+            GinIndex(fields=['ancestors_ids'], name='goals_sector_ancestors_gin'),
+            GinIndex(fields=['plans_ids'], name='goals_sector_plans_gin'),
+        ]
 
     def __str__(self):
         return self.name
@@ -172,6 +191,9 @@ class Sector(MPTTModel):
             self.extras['type_name'] = self.type.name
         if self.parent:
             self.extras['parent_name'] = self.parent.name
+            self.ancestors_ids = (self.parent.ancestors_ids or []) + [self.parent_id]
+        else:
+            self.ancestors_ids = []
         super(Sector, self).save(*args, **kwargs)
 
     def get_slug(self):
@@ -210,15 +232,10 @@ class Sector(MPTTModel):
 
     @cached_property
     def parent_name(self):
-        if self.parent:
+        if self.parent_id:
             return self.extras.get('parent_name', '') or self.parent.name
         return ''
 
-    @cached_property
-    def ancestors_ids(self):
-        return json.loads(self.extras.get('ancestors_ids', '[]'))\
-            or [ancestor.id for ancestor in self.get_ancestors()]
-
     @cached_property
     def ancestors_codes(self):
         return json.loads(self.extras.get('ancestors_codes', '[]'))\
@@ -237,10 +254,6 @@ class Sector(MPTTModel):
     def themes_names(self):
         return json.loads(self.extras.get('themes_names', '[]'))
 
-    @cached_property
-    def plans_ids(self):
-        return json.loads(self.extras.get('plans_ids', '[]'))
-
     @cached_property
     def plans_codes(self):
         return json.loads(self.extras.get('plans_codes', '[]'))
@@ -258,6 +271,28 @@ class Sector(MPTTModel):
             # FIXME: Catch a specific exception
             return ''
 
+    def update_themes_extras(self):
+        themes = self.themes.prefetch_related('plan')
+        self.extras['themes_codes'] = json.dumps([t.code for t in themes])
+        self.extras['themes_names'] = json.dumps([t.name for t in themes])
+        self.plans_ids = list(set([t.plan.id for t in themes]))
+        self.extras['plans_codes'] = json.dumps(list(set([t.plan.code for t in themes])))
+        self.extras['plans_names'] = json.dumps(list(set([t.plan.name for t in themes])))
+        Sector.objects.filter(id=self.id).update(
+            extras=self.extras, plans_ids=self.plans_ids,
+            last_modified=timezone.now())
+
+    def update_ancestors_extras(self):
+        ancestors = list(self.get_ancestors())
+        self.ancestors_ids = [ancestor.id for ancestor in ancestors]
+        self.extras['ancestors_codes'] = json.dumps(
+            [ancestor.code for ancestor in ancestors])
+        self.extras['ancestors_names'] = json.dumps(
+            [ancestor.name for ancestor in ancestors])
+        Sector.objects.filter(id=self.id).update(
+            extras=self.extras, ancestors_ids=self.ancestors_ids,
+            last_modified=timezone.now())
+
 
 class Plan(models.Model):
     code = models.CharField(_('code'), max_length=10,
@@ -638,45 +673,29 @@ class Indicator(models.Model):
         verbose_name=_('Sectors ids'), default=[])
     plan_id = models.IntegerField(_('Plan ID'), null=True, blank=True,
                                   editable=False)
+    progress_count = models.PositiveIntegerField(
+        _('Progress count'), default=0, editable=False, db_index=True)
 
     class Meta:
         verbose_name = _('Indicator')
         verbose_name_plural = _('Indicators')
         unique_together = ['code', 'target', 'sector', 'theme']
+        indexes = [
+            GinIndex(fields=['sectors_ids'], name='goals_indicator_sectors_gin'),
+            models.Index(fields=['code', 'id'], name='goals_indicator_code_id'),
+        ]
 
     def __str__(self):
         return '%s %s : %s' \
             % (self.plan_code, self.code, self.name)
 
     def save(self, *args, **kwargs):
-        self.clean()
+        from .denormalization import IndicatorDenormalizer
+        denormalizer = kwargs.pop('denormalizer', None) \
+            or IndicatorDenormalizer.for_indicators([self])
         if not self.slug:
             self.slug = self.get_slug()
-        if self.theme:
-            self.extras['theme_code'] = self.theme.code
-            self.extras['theme_name'] = self.theme.name
-        if self.sector:
-            self.sectors_ids = self.sector.ancestors_ids + [self.sector_id]
-            self.extras['sector_code'] = self.sector.code
-            self.extras['sector_name'] = self.sector.name
-            self.extras['sectors_codes'] = json.dumps(self.sector.ancestors_codes + [self.sector.code])
-            self.extras['sectors_names'] = json.dumps(self.sector.ancestors_names + [self.sector.name])
-            self.extras['sector_type_code'] = self.sector.type.code
-            self.extras['sector_type_name'] = self.sector.type.name
-            self.extras['root_sector_id'] = self.sector.get_root().id
-            self.extras['root_sector_code'] = self.sector.get_root().code
-            self.extras['root_sector_name'] = self.sector.get_root().name
-        if self.target:
-            self.extras['target_code'] = self.target.code
-            self.extras['target_name'] = self.target.name
-        if self.goal:
-            self.extras['goal_id'] = self.goal.id
-            self.extras['goal_code'] = self.goal.code
-            self.extras['goal_name'] = self.goal.name
-        if self.plan:
-            self.plan_id = self.plan.id
-            self.extras['plan_code'] = self.plan.code
-            self.extras['plan_name'] = self.plan.name
+        denormalizer.apply(self)
         super(Indicator, self).save(*args, **kwargs)
 
     def clean(self):
@@ -867,10 +886,27 @@ class Component(models.Model):
     last_modified = models.DateTimeField(_('Last modified'),
                                          auto_now=True)
     extras = HStoreField(_('Extras'), blank=True, null=True, default={})
+    targets_ids = ArrayField(
+        models.IntegerField(), null=True, blank=True, editable=False,
+        verbose_name=_('Targets ids'), default=[])
+    goals_ids = ArrayField(
+        models.IntegerField(), null=True, blank=True, editable=False,
+        verbose_name=_('Goals ids'), default=[])
+    plans_ids = ArrayField(
+        models.IntegerField(), null=True, blank=True, editable=False,
+        verbose_name=_('Plans ids'), default=[])
+    progress_count = models.PositiveIntegerField(
+        _('Progress count'), default=0, editable=False, db_index=True)
 
     class Meta:
         verbose_name = _('Component')
         verbose_name_plural = _('Components')
+        indexes = [
+            GinIndex(fields=['targets_ids'], name='goals_component_targets_gin'),
+            GinIndex(fields=['goals_ids'], name='goals_component_goals_gin'),
+            GinIndex(fields=['plans_ids'], name='goals_component_plans_gin'),
+            models.Index(fields=['code', 'id'], name='goals_component_code_id'),
+        ]
 
     def __str__(self):
         return self.name
@@ -925,10 +961,6 @@ class Component(models.Model):
         return json.loads(self.extras.get('indicators_names', '[]')) \
             or list(self.indicators.values_list('name', flat=True))
 
-    @cached_property
-    def targets_ids(self):
-        return json.loads(self.extras.get('targets_ids', '[]'))
-
     @cached_property
     def targets_codes(self):
         return json.loads(self.extras.get('targets_codes', '[]'))
@@ -937,10 +969,6 @@ class Component(models.Model):
     def targets_names(self):
         return json.loads(self.extras.get('targets_names', '[]'))
 
-    @cached_property
-    def goals_ids(self):
-        return json.loads(self.extras.get('goals_ids', '[]'))
-
     @cached_property
     def goals_codes(self):
         return json.loads(self.extras.get('goals_codes', '[]'))
@@ -949,10 +977,6 @@ class Component(models.Model):
     def goals_names(self):
         return json.loads(self.extras.get('goals_names', '[]'))
 
-    @cached_property
-    def plans_ids(self):
-        return json.loads(self.extras.get('plans_ids', '[]'))
-
     @cached_property
     def plans_codes(self):
         return json.loads(self.extras.get('plans_codes', '[]'))
@@ -964,6 +988,25 @@ class Component(models.Model):
     def get_progress_count(self):
         return Progress.objects.filter(component=self.id).count()
 
+    def update_indicators_extras(self):
+        indctrs = self.indicators\
+            .prefetch_related('target', 'target__goal', 'target__goal__plan')
+        self.extras['indicators_codes'] = json.dumps([i.code for i in indctrs])
+        self.extras['indicators_names'] = json.dumps([i.name for i in indctrs])
+        self.targets_ids = list(set([i.target.id for i in indctrs if i.target]))
+        self.extras['targets_codes'] = json.dumps(list(set([i.target.code for i in indctrs if i.target])))
+        self.extras['targets_names'] = json.dumps(list(set([i.target.name for i in indctrs if i.target])))
+        self.goals_ids = list(set([i.target.goal.id for i in indctrs if i.target]))
+        self.extras['goals_codes'] = json.dumps(list(set([i.target.goal.code for i in indctrs if i.target])))
+        self.extras['goals_names'] = json.dumps(list(set([i.target.goal.name for i in indctrs if i.target])))
+        self.plans_ids = list(set([i.plan.id for i in indctrs if i.plan]))
+        self.extras['plans_codes'] = json.dumps(list(set([i.plan.code for i in indctrs if i.plan])))
+        self.extras['plans_names'] = json.dumps(list(set([i.plan.name for i in indctrs if i.plan])))
+        Component.objects.filter(id=self.id).update(
+            extras=self.extras, targets_ids=self.targets_ids,
+            goals_ids=self.goals_ids, plans_ids=self.plans_ids,
+            last_modified=timezone.now())
+
 
 class Progress(models.Model):
     component = models.ForeignKey(Component,
@@ -972,7 +1015,7 @@ class Progress(models.Model):
     area = models.ForeignKey(Area, verbose_name=_('Area'),
                              related_name='progress')
     groups = ArrayField(
-        models.CharField(max_length=50, blank=True), null=True,
+        models.CharField(max_length=50, blank=True),
         blank=True, verbose_name=_('Groups'), default=[])
     year = models.PositiveIntegerField(_('Year'))
     fiscal_year = models.CharField(_('Fiscal year'), max_length=9,
@@ -987,11 +1030,24 @@ class Progress(models.Model):
     class Meta:
         verbose_name = _('Progress')
         verbose_name_plural = _('Progress')
+        indexes = [
+            models.Index(fields=['component', '-year'], name='goals_progress_component_year'),
+            models.Index(fields=['-year', 'id'], name='goals_progress_year_id'),
+        ]
 
     def __str__(self):
         return '%d:%d' % (self.year, self.value)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(Progress, cls).from_db(db, field_names, values)
+        # Keep loaded relations to detect moved rows after saving
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     def save(self, *args, **kwargs):
+        if self.groups is None:
+            self.groups = []
         self.extras['area_code'] = self.area.code
         self.extras['area_name'] = self.area.name
         self.extras['area_type_id'] = self.area.type_id
@@ -1049,43 +1105,125 @@ class Progress(models.Model):
         return self.extras.get('value_unit', '')
 
 
+class FlatProgress(models.Model):
+    """Read model of progress with the labels of its area, area type,
+    component, indicators, targets, goals and plans flattened into
+    typed columns, with the id, code and name arrays ordered by id.
+    Backed by the ``goals_flatprogress`` materialized view, see
+    ``goals.readmodels``.
+    """
+    component = models.ForeignKey(Component, on_delete=models.DO_NOTHING,
+                                  related_name='+', db_constraint=False)
+    component_code = models.CharField(max_length=10)
+    component_name = models.CharField(max_length=255)
+    value_unit = models.CharField(max_length=50, blank=True)
+    area = models.ForeignKey(Area, on_delete=models.DO_NOTHING,
+                             related_name='+', db_constraint=False)
+    area_code = models.CharField(max_length=20)
+    area_name = models.CharField(max_length=255)
+    area_level = models.PositiveIntegerField()
+    area_type_id = models.IntegerField()
+    area_type_code = models.CharField(max_length=20)
+    area_type_name = models.CharField(max_length=255)
+    groups = ArrayField(models.CharField(max_length=50))
+    year = models.PositiveIntegerField()
+    fiscal_year = models.CharField(max_length=9)
+    value = models.FloatField()
+    remarks = models.TextField()
+    indicators_ids = ArrayField(models.IntegerField())
+    indicators_codes = ArrayField(models.CharField(max_length=10))
+    indicators_names = ArrayField(models.CharField(max_length=255))
+    targets_ids = ArrayField(models.IntegerField())
+    targets_codes = ArrayField(models.CharField(max_length=10))
+    targets_names = ArrayField(models.CharField(max_length=255))
+    goals_ids = ArrayField(models.IntegerField())
+    goals_codes = ArrayField(models.CharField(max_length=10))
+    goals_names = ArrayField(models.CharField(max_length=255))
+    plans_ids = ArrayField(models.IntegerField())
+    plans_codes = ArrayField(models.CharField(max_length=10))
+    plans_names = ArrayField(models.CharField(max_length=255))
+    created = models.DateTimeField()
+    last_modified = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'goals_flatprogress'
+        verbose_name = _('Flat progress')
+        verbose_name_plural = _('Flat progress')
+
+    def __str__(self):
+        return '%d:%d' % (self.year, self.value)
+
+
+def update_sectors_themes_extras(sector_ids):
+    for sector in Sector.objects.filter(id__in=sector_ids):
+        sector.update_themes_extras()
+
+
 @receiver(m2m_changed, sender=Sector.themes.through)
-def sector_themes_changed(sender, instance, action, **kwargs):
-    if action == 'post_add':
-        themes = instance.themes.prefetch_related('plan')
-        instance.extras['themes_codes'] = json.dumps([t.code for t in themes])
-        instance.extras['themes_names'] = json.dumps([t.name for t in themes])
-        instance.extras['plans_ids'] = json.dumps(list(set([t.plan.id for t in themes])))
-        instance.extras['plans_codes'] = json.dumps(list(set([t.plan.code for t in themes])))
-        instance.extras['plans_names'] = json.dumps(list(set([t.plan.name for t in themes])))
-        Sector.objects.filter(id=instance.id).update(extras=instance.extras)
+def sector_themes_changed(sender, instance, action, reverse,
+                          pk_set=None, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            instance.update_themes_extras()
+    elif action == 'pre_clear':
+        # instance is a theme
+        instance._cleared_sectors_ids = list(
+            instance.sectors.values_list('id', flat=True))
+    elif action == 'post_clear':
+        update_sectors_themes_extras(instance._cleared_sectors_ids)
+    elif action in ('post_add', 'post_remove'):
+        update_sectors_themes_extras(pk_set)
+
+
+@receiver(pre_delete, sender=Theme)
+def theme_deleting(sender, instance, **kwargs):
+    # The relations are deleted without m2m_changed
+    instance._deleted_sectors_ids = list(
+        instance.sectors.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Theme)
+def theme_deleted(sender, instance, **kwargs):
+    update_sectors_themes_extras(
+        getattr(instance, '_deleted_sectors_ids', []))
+
+
+def update_components_indicators_extras(component_ids):
+    for component in Component.objects.filter(id__in=component_ids):
+        component.update_indicators_extras()
 
 
 @receiver(m2m_changed, sender=Component.indicators.through)
-def component_indicators_changed(sender, instance, action, **kwargs):
-    if action == 'post_add':
-        indctrs = instance.indicators\
-            .prefetch_related('target', 'target__goal', 'target__goal__plan')
-        instance.extras['indicators_codes'] = json.dumps([i.code for i in indctrs])
-        instance.extras['indicators_names'] = json.dumps([i.name for i in indctrs])
-        instance.extras['targets_ids'] = json.dumps(list(set([i.target.id for i in indctrs if i.target])))
-        instance.extras['targets_codes'] = json.dumps(list(set([i.target.code for i in indctrs if i.target])))
-        instance.extras['targets_names'] = json.dumps(list(set([i.target.name for i in indctrs if i.target])))
-        instance.extras['goals_ids'] = json.dumps(list(set([i.target.goal.id for i in indctrs if i.target])))
-        instance.extras['goals_codes'] = json.dumps(list(set([i.target.goal.code for i in indctrs if i.target])))
-        instance.extras['goals_names'] = json.dumps(list(set([i.target.goal.name for i in indctrs if i.target])))
-        instance.extras['plans_ids'] = json.dumps(list(set([i.plan.id for i in indctrs if i.plan])))
-        instance.extras['plans_codes'] = json.dumps(list(set([i.plan.code for i in indctrs if i.plan])))
-        instance.extras['plans_names'] = json.dumps(list(set([i.plan.name for i in indctrs if i.plan])))
-        Component.objects.filter(id=instance.id).update(extras=instance.extras)
+def component_indicators_changed(sender, instance, action, reverse,
+                                 pk_set=None, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            instance.update_indicators_extras()
+    elif action == 'pre_clear':
+        # instance is an indicator
+        instance._cleared_components_ids = list(
+            instance.components.values_list('id', flat=True))
+    elif action == 'post_clear':
+        update_components_indicators_extras(instance._cleared_components_ids)
+    elif action in ('post_add', 'post_remove'):
+        update_components_indicators_extras(pk_set)
+
+
+@receiver(pre_delete, sender=Indicator)
+def indicator_deleting(sender, instance, **kwargs):
+    # The relations are deleted without m2m_changed
+    instance._deleted_components_ids = list(
+        instance.components.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Indicator)
+def indicator_deleted(sender, instance, **kwargs):
+    update_components_indicators_extras(
+        getattr(instance, '_deleted_components_ids', []))
 
 
 @receiver(node_moved, sender=Sector)
 def sector_node_moved(sender, instance, **kwargs):
-    instance.extras['ancestors_ids'] = json.dumps(
-        [ancestor.id for ancestor in instance.get_ancestors()])
-    instance.extras['ancestors_codes'] = json.dumps(
-        [ancestor.code for ancestor in instance.get_ancestors()])
-    instance.extras['ancestors_names'] = json.dumps(
-        [ancestor.name for ancestor in instance.get_ancestors()])
-    Sector.objects.filter(id=instance.id).update(extras=instance.extras)
+    for sector in instance.get_descendants(include_self=True):
+        sector.update_ancestors_extras()
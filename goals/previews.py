@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import Component, Progress
+from .signals import progress_bulk_changed
+
+
+PREVIEW_CACHE_TIMEOUT = getattr(settings, 'GOALS_PROGRESS_PREVIEW_CACHE_TIMEOUT', 24 * 60 * 60)
+
+# Latest progress (by year, then the highest area in the tree)
+# of every indicator, fetched for a whole page in one query.
+LATEST_PROGRESS_SQL = """
+SELECT i.id, lp.year, lp.value, lp.area_id, lp.value_unit
+FROM unnest(%s::integer[]) AS i(id)
+CROSS JOIN LATERAL (
+    SELECT p.year, p.value, p.area_id, p.extras -> 'value_unit' AS value_unit
+    FROM goals_component_indicators ci
+    JOIN goals_progress p ON p.component_id = ci.component_id
+    JOIN goals_area a ON a.id = p.area_id
+    WHERE ci.indicator_id = i.id
+    ORDER BY p.year DESC, a.level
+    LIMIT 1
+) AS lp
+"""
+
+
+def _cache_key(indicator_id):
+    return 'goals:progress_preview:%s' % indicator_id
+
+
+def get_progress_previews(indicator_ids):
+    """Return a ``{indicator id: [latest progress]}`` dict. The list is
+    empty for indicators without progress.
+    """
+    indicator_ids = set(indicator_ids)
+    keys = dict((_cache_key(i), i) for i in indicator_ids)
+    cached = cache.get_many(keys.keys())
+    previews = dict((keys[k], v) for k, v in cached.items())
+    missing = [i for i in indicator_ids if i not in previews]
+    if missing:
+        fetched = dict((i, []) for i in missing)
+        with connection.cursor() as cursor:
+            cursor.execute(LATEST_PROGRESS_SQL, [missing])
+            for indicator_id, year, value, area, value_unit in cursor.fetchall():
+                fetched[indicator_id] = [{
+                    'year': year,
+                    'value': value,
+                    'area': area,
+                    'value_unit': value_unit or '',
+                }]
+        cache.set_many(dict((_cache_key(i), v) for i, v in fetched.items()),
+                       PREVIEW_CACHE_TIMEOUT)
+        previews.update(fetched)
+    return previews
+
+
+def invalidate_progress_previews(indicator_ids):
+    cache.delete_many([_cache_key(i) for i in set(indicator_ids)])
+
+
+def invalidate_components_previews(component_ids):
+    invalidate_progress_previews(
+        Component.indicators.through.objects
+        .filter(component_id__in=set(component_ids))
+        .values_list('indicator_id', flat=True))
+
+
+@receiver(post_save, sender=Progress)
+@receiver(post_delete, sender=Progress)
+def progress_previews_changed(sender, instance, **kwargs):
+    loaded_component_id = getattr(instance, '_loaded_values', {})\
+        .get('component_id', instance.component_id)
+    invalidate_components_previews([instance.component_id, loaded_component_id])
+
+
+@receiver(post_save, sender=Component)
+def component_previews_changed(sender, instance, created=False, **kwargs):
+    # The value unit is part of the previews
+    if not created:
+        invalidate_components_previews([instance.pk])
+
+
+@receiver(progress_bulk_changed, sender=Progress)
+def progress_bulk_previews_changed(sender, component_ids, **kwargs):
+    invalidate_components_previews(component_ids)
+
+
+@receiver(m2m_changed, sender=Component.indicators.through)
+def component_indicators_previews_changed(sender, instance, action, reverse,
+                                          pk_set=None, **kwargs):
+    if reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_progress_previews([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        invalidate_progress_previews(pk_set)
+    elif action == 'pre_clear':
+        invalidate_progress_previews(
+            instance.indicators.values_list('id', flat=True))
@@ -0,0 +1,196 @@
+from collections import defaultdict
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save
+from django.utils import timezone
+from .models import (AreaType, Area, Plan, Theme, SectorType, Sector, Goal,
+                     Target, Indicator, Component, Progress)
+from .denormalization import recompute_indicators
+from .generations import bump_generations
+from .previews import invalidate_components_previews
+
+
+def _code(obj):
+    return obj.code
+
+
+def _name(obj):
+    return obj.name
+
+
+def _contains(field):
+    return lambda obj: Q(**{'%s__contains' % field: [obj.pk]})
+
+
+def _refresh_sectors_themes(queryset):
+    for sector in queryset.iterator():
+        sector.update_themes_extras()
+
+
+def _refresh_sectors_ancestors(queryset):
+    for sector in queryset.iterator():
+        sector.update_ancestors_extras()
+
+
+def _refresh_components_indicators(queryset):
+    for component in queryset.distinct().iterator():
+        component.update_indicators_extras()
+
+
+def _refresh_indicators(queryset):
+    recompute_indicators(queryset)
+
+
+# For every parent model: the fields which are copied to other models
+# and a list of (dependent model, lookup, update) tuples.
+#
+# A lookup is either a field path pointing to the parent or a callable
+# returning a Q object for the parent. An update is either a mapping
+# of extras keys to getters, merged into the extras of all dependent
+# rows with a single UPDATE, or a callable which refreshes the
+# dependent queryset (used for the JSON encoded list values).
+DEPENDENTS = {
+    Plan: (('code', 'name'), [
+        (Theme, 'plan', {'plan_code': _code, 'plan_name': _name}),
+        (Goal, 'plan', {'plan_code': _code, 'plan_name': _name}),
+        (Target, 'goal__plan', {'plan_code': _code, 'plan_name': _name}),
+        (Indicator, 'plan_id', {'plan_code': _code, 'plan_name': _name}),
+        (Sector, _contains('plans_ids'), _refresh_sectors_themes),
+        (Component, _contains('plans_ids'), _refresh_components_indicators),
+    ]),
+    Theme: (('code', 'name', 'plan_id'), [
+        (Indicator, 'theme', _refresh_indicators),
+        (Sector, 'themes', _refresh_sectors_themes),
+        (Component, 'indicators__theme', _refresh_components_indicators),
+    ]),
+    Goal: (('code', 'name', 'plan_id'), [
+        (Target, 'goal', {
+            'goal_code': _code,
+            'goal_name': _name,
+            'plan_id': lambda obj: obj.plan_id,
+            'plan_code': lambda obj: obj.plan.code,
+            'plan_name': lambda obj: obj.plan.name,
+        }),
+        (Indicator, 'target__goal', _refresh_indicators),
+        (Component, _contains('goals_ids'), _refresh_components_indicators),
+    ]),
+    Indicator: (('code', 'name', 'target_id', 'theme_id', 'plan_id'), [
+        (Component, 'indicators', _refresh_components_indicators),
+    ]),
+    Target: (('code', 'name', 'goal_id'), [
+        (Indicator, 'target', _refresh_indicators),
+        (Component, _contains('targets_ids'), _refresh_components_indicators),
+    ]),
+    SectorType: (('code', 'name'), [
+        (Sector, 'type', {'type_code': _code, 'type_name': _name}),
+        (Indicator, 'sector__type', {'sector_type_code': _code, 'sector_type_name': _name}),
+    ]),
+    Sector: (('code', 'name', 'parent_id'), [
+        (Sector, 'parent', {'parent_name': _name}),
+        (Sector, _contains('ancestors_ids'), _refresh_sectors_ancestors),
+        (Indicator, _contains('sectors_ids'), _refresh_indicators),
+    ]),
+    AreaType: (('code', 'name'), [
+        (Area, 'type', {'type_code': _code, 'type_name': _name}),
+        (Progress, 'area__type', {'area_type_code': _code, 'area_type_name': _name}),
+    ]),
+    Area: (('code', 'name', 'type_id'), [
+        (Progress, 'area', {
+            'area_code': _code,
+            'area_name': _name,
+            'area_type_id': lambda obj: obj.type_id,
+            'area_type_code': lambda obj: obj.type.code,
+            'area_type_name': lambda obj: obj.type.name,
+        }),
+    ]),
+    Component: (('code', 'name', 'value_unit'), [
+        (Progress, 'component', {
+            'component_code': _code,
+            'component_name': _name,
+            'value_unit': lambda obj: obj.value_unit,
+        }),
+    ]),
+}
+
+
+def update_extras(queryset, extras):
+    """Merge ``extras`` into the extras of all rows in ``queryset``
+    with a single UPDATE statement.
+    """
+    model = queryset.model
+    subquery, params = queryset.values('pk').query.sql_with_params()
+    keys = sorted(extras)
+    sql = 'UPDATE {table} SET extras = COALESCE(extras, \'\'::hstore) || ' \
+          'hstore(%s::text[], %s::text[]), last_modified = %s ' \
+          'WHERE {pk} IN ({subquery})'.format(
+              table=connection.ops.quote_name(model._meta.db_table),
+              pk=connection.ops.quote_name(model._meta.pk.column),
+              subquery=subquery)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [keys, [str(extras[k]) for k in keys],
+                             timezone.now()] + list(params))
+        return cursor.rowcount
+
+
+def get_search_tasks():
+    if apps.is_installed('goals_search'):
+        from goals_search import tasks
+        return tasks
+
+
+def propagate(instance):
+    """Rewrite denormalised copies of ``instance`` fields on all
+    dependent rows and queue the search index update of the indexed
+    ones, which are updated without sending ``post_save``.
+    """
+    fields, dependents = DEPENDENTS[instance.__class__]
+    search_tasks = get_search_tasks()
+    reindex = defaultdict(set)
+    with transaction.atomic():
+        for model, lookup, update in dependents:
+            if callable(lookup):
+                query = lookup(instance)
+            else:
+                query = Q(**{lookup: instance.pk})
+            queryset = model._default_manager.filter(query)
+            if search_tasks is not None and search_tasks.is_indexed(model):
+                reindex[model].update(queryset.values_list('pk', flat=True))
+            if callable(update):
+                update(queryset)
+            else:
+                update_extras(queryset, dict(
+                    (k, getter(instance)) for k, getter in update.items()))
+    bump_generations(*[model for model, lookup, update in dependents])
+    if isinstance(instance, Component):
+        # Previews include the value unit copied to progress extras
+        invalidate_components_previews([instance.pk])
+    for model, pks in reindex.items():
+        search_tasks.queue_index_update(model, pks)
+
+
+def track_changes(sender, instance, raw=False, **kwargs):
+    instance._propagate_changes = False
+    if raw or not instance.pk:
+        return
+    fields = DEPENDENTS[sender][0]
+    old = sender._default_manager.filter(pk=instance.pk).values(*fields).first()
+    if old is not None:
+        instance._propagate_changes = any(
+            old[f] != getattr(instance, f) for f in fields)
+
+
+def propagate_changes(sender, instance, created=False, raw=False, **kwargs):
+    if created or raw or not getattr(instance, '_propagate_changes', False):
+        return
+    from .tasks import propagate_changes as task
+    model_name = sender._meta.model_name
+    pk = instance.pk
+    transaction.on_commit(lambda: task.delay(model_name, pk))
+
+
+for model in DEPENDENTS:
+    pre_save.connect(track_changes, sender=model,
+                     dispatch_uid='goals_track_changes_%s' % model._meta.model_name)
+    post_save.connect(propagate_changes, sender=model,
+                      dispatch_uid='goals_propagate_changes_%s' % model._meta.model_name)
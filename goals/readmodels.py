@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import (AreaType, Area, Component, Indicator, Target, Goal, Plan,
+                     Progress)
+from .signals import progress_bulk_changed
+
+
+FLAT_PROGRESS_REFRESH_DELAY = getattr(settings, 'GOALS_FLAT_PROGRESS_REFRESH_DELAY', 60)
+
+_PENDING_KEY = 'goals:flatprogress:pending'
+
+
+def refresh_flat_progress():
+    """Refresh the ``goals_flatprogress`` materialized view without
+    blocking reads. Only changed rows are written.
+    """
+    cache.delete(_PENDING_KEY)
+    with connection.cursor() as cursor:
+        cursor.execute('REFRESH MATERIALIZED VIEW CONCURRENTLY goals_flatprogress')
+
+
+def schedule_flat_progress_refresh():
+    """Refresh the read model once the current transaction commits,
+    coalescing all changes within ``GOALS_FLAT_PROGRESS_REFRESH_DELAY``
+    seconds into a single refresh.
+    """
+    from .tasks import refresh_flat_progress as task
+
+    def schedule():
+        if cache.add(_PENDING_KEY, True, FLAT_PROGRESS_REFRESH_DELAY * 10):
+            task.apply_async(countdown=FLAT_PROGRESS_REFRESH_DELAY)
+
+    transaction.on_commit(schedule)
+
+
+@receiver(post_save, sender=Progress)
+@receiver(post_delete, sender=Progress)
+@receiver(post_save, sender=Component)
+@receiver(post_delete, sender=Component)
+@receiver(post_save, sender=Area)
+@receiver(post_delete, sender=Area)
+@receiver(post_save, sender=AreaType)
+@receiver(post_save, sender=Indicator)
+@receiver(post_delete, sender=Indicator)
+@receiver(post_save, sender=Target)
+@receiver(post_save, sender=Goal)
+@receiver(post_save, sender=Plan)
+def flat_progress_source_changed(sender, raw=False, **kwargs):
+    if not raw:
+        schedule_flat_progress_refresh()
+
+
+@receiver(progress_bulk_changed, sender=Progress)
+def flat_progress_bulk_changed(sender, **kwargs):
+    schedule_flat_progress_refresh()
+
+
+@receiver(m2m_changed, sender=Component.indicators.through)
+def flat_progress_indicators_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        schedule_flat_progress_refresh()
@@ -0,0 +1,100 @@
+import json
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q, Sum, Avg, Min, Max, Count
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from mptt.signals import node_moved
+from .models import Area, Progress
+from .signals import progress_bulk_changed
+from .generations import get_counter, bump_counter
+
+
+ROLLUP_CACHE_TIMEOUT = getattr(settings, 'GOALS_ROLLUP_CACHE_TIMEOUT', 60 * 60)
+
+
+def _version_key(area_id):
+    return 'goals:rollup:version:%s' % area_id
+
+
+def get_rollup_version(area_id):
+    return get_counter(_version_key(area_id))
+
+
+def invalidate_rollups(area_ids):
+    """Invalidate cached roll-ups of the given areas and their ancestors.
+    """
+    areas = Area.objects.filter(id__in=set(area_ids))\
+        .values_list('tree_id', 'lft', 'rght')
+    if not areas:
+        return
+    query = Q()
+    for tree_id, lft, rght in areas:
+        query |= Q(tree_id=tree_id, lft__lte=lft, rght__gte=rght)
+    for area_id in Area.objects.filter(query).values_list('id', flat=True):
+        bump_counter(_version_key(area_id))
+
+
+def compute_rollup(area, components=None, years=None, groups=()):
+    """Aggregate progress of ``area`` and all its descendants per
+    component and year using a single MPTT range query.
+
+    Only progress of ``groups`` is aggregated, totals by default, so
+    disaggregated values are not added to the totals.
+    """
+    queryset = Progress.objects.filter(
+        area__tree_id=area.tree_id,
+        area__lft__gte=area.lft,
+        area__rght__lte=area.rght,
+        groups=list(groups))
+    if components:
+        queryset = queryset.filter(component__in=components)
+    if years:
+        queryset = queryset.filter(year__in=years)
+    return list(
+        queryset.order_by()
+        .values('component', 'year')
+        .annotate(sum=Sum('value'), avg=Avg('value'), min=Min('value'),
+                  max=Max('value'), count=Count('id'))
+        .order_by('component', 'year'))
+
+
+def get_rollup(area, components=None, years=None, groups=()):
+    components = sorted(set(components or []))
+    years = sorted(set(years or []))
+    groups = list(groups)
+    key = 'goals:rollup:%s:%s:%s:%s:%s' % (
+        area.pk, get_rollup_version(area.pk),
+        ','.join(str(c) for c in components),
+        ','.join(str(y) for y in years),
+        json.dumps(groups))
+    rollup = cache.get(key)
+    if rollup is None:
+        rollup = compute_rollup(area, components, years, groups)
+        cache.set(key, rollup, ROLLUP_CACHE_TIMEOUT)
+    return rollup
+
+
+@receiver(post_save, sender=Progress)
+@receiver(post_delete, sender=Progress)
+def progress_rollups_changed(sender, instance, **kwargs):
+    loaded_area_id = getattr(instance, '_loaded_values', {})\
+        .get('area_id', instance.area_id)
+    invalidate_rollups([instance.area_id, loaded_area_id])
+
+
+@receiver(post_save, sender=Area)
+@receiver(post_delete, sender=Area)
+@receiver(node_moved, sender=Area)
+def area_rollups_changed(sender, instance, **kwargs):
+    # The previous parent of a moved area too
+    loaded_parent_id = getattr(instance, '_loaded_values', {})\
+        .get('parent_id', instance.parent_id)
+    parent_ids = [i for i in [instance.parent_id, loaded_parent_id] if i]
+    if parent_ids:
+        invalidate_rollups(parent_ids)
+
+
+@receiver(progress_bulk_changed, sender=Progress)
+def progress_bulk_rollups_changed(sender, area_ids, **kwargs):
+    invalidate_rollups(area_ids)
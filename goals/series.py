@@ -0,0 +1,115 @@
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Progress
+from .signals import progress_bulk_changed
+from .generations import get_counter, bump_counter
+
+
+SERIES_CACHE_TIMEOUT = getattr(settings, 'GOALS_SERIES_CACHE_TIMEOUT', 24 * 60 * 60)
+
+
+def _version_key(component_id):
+    return 'goals:series:version:%s' % component_id
+
+
+def _cache_key(component_id, version, area_id, groups):
+    return 'goals:series:%s:%s:%s:%s' % (
+        component_id, version, area_id, ','.join(groups))
+
+
+def get_series_version(component_id):
+    return get_counter(_version_key(component_id))
+
+
+def invalidate_series(component_ids):
+    for component_id in set(component_ids):
+        bump_counter(_version_key(component_id))
+
+
+def get_trend(years, values):
+    """Least squares slope of ``values`` per year.
+    """
+    if len(years) < 2:
+        return None
+    mean_year = float(sum(years)) / len(years)
+    mean_value = float(sum(values)) / len(values)
+    variance = sum((y - mean_year) ** 2 for y in years)
+    covariance = sum((y - mean_year) * (v - mean_value)
+                     for y, v in zip(years, values))
+    return covariance / variance
+
+
+def build_series(component_id, area_id, points):
+    """Build the series payload from ``(year, value)`` pairs ordered
+    by year.
+    """
+    values_by_year = OrderedDict(points)
+    years = list(values_by_year.keys())
+    values = list(values_by_year.values())
+    gaps = []
+    if years:
+        gaps = sorted(set(range(years[0], years[-1] + 1)) - set(years))
+    return OrderedDict([
+        ('component', component_id),
+        ('area', area_id),
+        ('years', years),
+        ('values', values),
+        ('gaps', gaps),
+        ('latest', OrderedDict([('year', years[-1]), ('value', values[-1])])
+         if years else None),
+        ('trend', get_trend(years, values)),
+    ])
+
+
+def compute_series(component_id, area_ids, groups=()):
+    """Compute the series of ``component_id`` for every area in
+    ``area_ids`` with a single query.
+    """
+    points = dict((area_id, []) for area_id in area_ids)
+    rows = Progress.objects\
+        .filter(component_id=component_id, area_id__in=area_ids,
+                groups=list(groups))\
+        .order_by('area_id', 'year', 'last_modified')\
+        .values_list('area_id', 'year', 'value')
+    for area_id, year, value in rows:
+        # The most recently modified value of a year wins
+        points[area_id].append((year, value))
+    return dict((area_id, build_series(component_id, area_id, p))
+                for area_id, p in points.items())
+
+
+def get_series(component_id, area_ids, groups=()):
+    """Return the time series of ``component_id`` in each of the
+    ``area_ids``, from the cache when possible.
+    """
+    groups = list(groups)
+    version = get_series_version(component_id)
+    keys = OrderedDict(
+        (area_id, _cache_key(component_id, version, area_id, groups))
+        for area_id in area_ids)
+    cached = cache.get_many(keys.values())
+    series = dict((area_id, cached[key]) for area_id, key in keys.items()
+                  if key in cached)
+    missing = [area_id for area_id in keys if area_id not in series]
+    if missing:
+        computed = compute_series(component_id, missing, groups)
+        cache.set_many(dict((keys[area_id], s) for area_id, s in computed.items()),
+                       SERIES_CACHE_TIMEOUT)
+        series.update(computed)
+    return [series[area_id] for area_id in keys]
+
+
+@receiver(post_save, sender=Progress)
+@receiver(post_delete, sender=Progress)
+def progress_series_changed(sender, instance, **kwargs):
+    loaded_component_id = getattr(instance, '_loaded_values', {})\
+        .get('component_id', instance.component_id)
+    invalidate_series([instance.component_id, loaded_component_id])
+
+
+@receiver(progress_bulk_changed, sender=Progress)
+def progress_bulk_series_changed(sender, component_ids, **kwargs):
+    invalidate_series(component_ids)
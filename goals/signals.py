@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+
+# Sent after progress rows are written in bulk, bypassing
+# Progress.save() and the model signals.
+progress_bulk_changed = Signal(providing_args=['area_ids', 'component_ids'])
@@ -0,0 +1,24 @@
+from celery import shared_task
+from django.apps import apps
+from .propagation import propagate
+from .generations import bump_generations
+from .models import FlatProgress
+from . import readmodels
+
+
+@shared_task
+def propagate_changes(model_name, pk):
+    """Rewrite denormalised copies of a changed parent object.
+    """
+    model = apps.get_model('goals', model_name)
+    instance = model._default_manager.filter(pk=pk).first()
+    if instance is not None:
+        propagate(instance)
+
+
+@shared_task
+def refresh_flat_progress():
+    """Refresh the flat progress read model.
+    """
+    readmodels.refresh_flat_progress()
+    bump_generations(FlatProgress)
@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+from django.utils.six import StringIO
+from rest_framework.test import APIClient
+from ..api.mixins import get_cache_metrics
+from .utils import LOCMEM_CACHES, create_area_type
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ResponseCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        create_area_type('AT1')
+        self.client = APIClient()
+        self.url = reverse('areatype-list')
+
+    def get(self, url=None, **params):
+        params.setdefault('format', 'json')
+        return self.client.get(url or self.url, params)
+
+    def test_hit_and_miss(self):
+        self.assertEqual(self.get()['X-Cache'], 'MISS')
+        self.assertEqual(self.get()['X-Cache'], 'HIT')
+        self.assertEqual(self.get(code='AT1')['X-Cache'], 'MISS')
+        self.assertEqual(get_cache_metrics('AreaTypeViewSet'),
+                         {'hit': 1, 'miss': 2, 'rate': 1.0 / 3})
+
+    def test_invalidated_on_change(self):
+        self.assertEqual(self.get().data['count'], 1)
+        create_area_type('AT2')
+        response = self.get()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 2)
+
+    def test_stats_command(self):
+        self.get()
+        self.get()
+        out = StringIO()
+        call_command('api_cache_stats', '--reset', stdout=out)
+        self.assertIn('AreaTypeViewSet: 1 hits, 1 misses, hit rate 50.0%',
+                      out.getvalue())
+        self.assertEqual(get_cache_metrics('AreaTypeViewSet')['hit'], 0)
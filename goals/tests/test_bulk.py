@@ -0,0 +1,82 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from .. import loaders
+from ..loaders import ProgressBulkWriter
+from ..models import Progress
+from .utils import (LOCMEM_CACHES, create_area_type, create_area,
+                    create_component)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProgressBulkTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.area = create_area(create_area_type(), 'A1')
+        self.component = create_component('C1')
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_superuser('admin', 'admin@example.com', 'admin'))
+
+    def get_item(self, **kwargs):
+        item = {'component': self.component.id, 'area': self.area.id,
+                'year': 2015, 'value': 1}
+        item.update(kwargs)
+        return item
+
+    def post(self, items):
+        return self.client.post(reverse('progress-bulk'), items, format='json')
+
+    def test_create_and_update(self):
+        response = self.post([self.get_item(), self.get_item(groups=['female'])])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        response = self.post([self.get_item(value=2)])
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(response.data['results'][0]['status'], 'updated')
+        self.assertEqual(Progress.objects.get(groups=[]).value, 2)
+
+    def test_invalid_items(self):
+        response = self.post([
+            self.get_item(area=True),
+            self.get_item(component=True),
+            self.get_item(year=True),
+            self.get_item(year=10 ** 12),
+            self.get_item(year=2015.5),
+            self.get_item(value=False),
+            self.get_item(value='nan'),
+            self.get_item(value='-inf'),
+            self.get_item(),
+            self.get_item(),
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(
+            [r['index'] for r in response.data['results'] if r['status'] == 'error'],
+            list(range(8)) + [9])
+
+    def test_failed_batch(self):
+        get_upsert_sql = loaders.get_upsert_sql
+        statements = [get_upsert_sql, lambda source: 'SELECT invalid']
+
+        def get_sql(source):
+            return statements.pop(0)(source)
+
+        items = [self.get_item(year=2015), self.get_item(year=2016)]
+        with mock.patch.object(loaders, 'get_upsert_sql', get_sql):
+            writer = ProgressBulkWriter(batch_size=1)
+            results = writer.write(items)
+        self.assertEqual([r['status'] for r in results], ['created', 'error'])
+        self.assertEqual(writer.failed_batches, ['1-1'])
+        self.assertEqual(list(Progress.objects.values_list('year', flat=True)), [2015])
+
+    def test_failed_batch_response(self):
+        with mock.patch.object(loaders, 'get_upsert_sql',
+                               lambda source: 'SELECT invalid'):
+            response = self.post([self.get_item()])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['failed_batches'], ['0-0'])
@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from .utils import LOCMEM_CACHES, create_area_type
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConditionalResponseTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.area_type = create_area_type('AT1')
+        self.client = APIClient()
+        self.url = reverse('areatype-list')
+
+    def get(self, url=None, etag=None, **params):
+        params.setdefault('format', 'json')
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(url or self.url, params, **headers)
+
+    def test_list_not_modified(self):
+        etag = self.get()['ETag']
+        response = self.get(etag=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_list_validated_without_aggregates(self):
+        etag = self.get(count='none')['ETag']
+        with self.assertNumQueries(0):
+            response = self.get(etag=etag, count='none')
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_changed(self):
+        etag = self.get()['ETag']
+        create_area_type('AT2')
+        response = self.get(etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_deleted(self):
+        create_area_type('AT2').delete()
+        etag = self.get(count='none')['ETag']
+        self.area_type.delete()
+        self.assertEqual(self.get(etag=etag, count='none').status_code, 200)
+
+    def test_detail_not_modified(self):
+        url = reverse('areatype-detail', args=[self.area_type.pk])
+        response = self.get(url)
+        self.assertEqual(self.get(url, etag=response['ETag']).status_code, 304)
+        response = self.client.get(
+            url, {'format': 'json'},
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,42 @@
+import csv
+import io
+import json
+from unittest import mock
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from .utils import (LOCMEM_CACHES, create_area_type, create_area,
+                    create_component, create_progress)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch('goals.api.views.EXPORT_CHUNK_SIZE', 1)
+class ProgressExportTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        area = create_area(create_area_type(), 'A1')
+        component = create_component('C1')
+        create_progress(component, area, 2015, 1)
+        create_progress(component, area, 2016, 2, groups=['female', 'urban'])
+        self.client = APIClient()
+
+    def get_rows(self, **params):
+        params['format'] = 'csv'
+        response = self.client.get(reverse('progress-export'), params)
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode('utf-8')
+        return list(csv.DictReader(io.StringIO(content)))
+
+    def test_columns_of_later_rows(self):
+        # The first chunk has no groups
+        rows = self.get_rows(ordering='year')
+        self.assertEqual(len(rows), 2)
+        self.assertIn('groups', rows[0])
+        self.assertEqual(json.loads(rows[0]['groups']), [])
+        self.assertEqual(json.loads(rows[1]['groups']), ['female', 'urban'])
+
+    def test_selected_fields(self):
+        rows = self.get_rows(fields='year,groups')
+        self.assertEqual(set(rows[0].keys()), {'year', 'groups'})
@@ -0,0 +1,46 @@
+from django.test import TestCase
+from ..loaders import ProgressLoader
+from ..models import Progress
+from .utils import create_area_type, create_area, create_component
+
+
+class ProgressLoaderTest(TestCase):
+
+    def setUp(self):
+        self.area = create_area(create_area_type(), 'A1')
+        self.component = create_component('C1')
+
+    def get_row(self, **kwargs):
+        row = {'component': 'C1', 'area': 'A1', 'year': '2015', 'value': '1'}
+        row.update(kwargs)
+        return row
+
+    def test_load(self):
+        loader = ProgressLoader()
+        loader.load([self.get_row(), self.get_row(groups='female;urban')])
+        self.assertEqual(loader.errors, [])
+        self.assertEqual(
+            sorted(Progress.objects.values_list('groups', 'value')),
+            [([], 1), (['female', 'urban'], 1)])
+
+    def test_reload_updates(self):
+        ProgressLoader().load([self.get_row(value='1')])
+        ProgressLoader().load([self.get_row(value='2')])
+        self.assertEqual(list(Progress.objects.values_list('value', flat=True)), [2])
+
+    def test_invalid_rows(self):
+        loader = ProgressLoader()
+        loaded = loader.load([
+            self.get_row(year='99999999999'),
+            self.get_row(year='-1'),
+            self.get_row(value='nan'),
+            self.get_row(value='inf'),
+            self.get_row(value='x'),
+            self.get_row(area='A2'),
+            self.get_row(year='2016'),
+        ])
+        self.assertEqual(loaded, 1)
+        self.assertEqual([lineno for lineno, error in loader.errors],
+                         [1, 2, 3, 4, 5, 6])
+        self.assertEqual(list(Progress.objects.values_list('year', flat=True)),
+                         [2016])
@@ -0,0 +1,44 @@
+from unittest import mock
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from ..api.pagination import KeysetPagination
+from ..models import Progress
+from .utils import (LOCMEM_CACHES, create_area_type, create_area,
+                    create_component, create_progress)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch.object(KeysetPagination, 'page_size', 2)
+class KeysetPaginationTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        area = create_area(create_area_type(), 'A1')
+        component = create_component('C1')
+        for year, groups in [(2015, []), (2016, []), (2016, ['female']),
+                             (2016, ['male']), (2017, [])]:
+            create_progress(component, area, year, 1, groups=groups)
+        self.client = APIClient()
+
+    def get(self, url, **params):
+        params.setdefault('format', 'json')
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_walk_pages(self):
+        data = self.get(reverse('progress-list'), cursor='')
+        self.assertNotIn('count', data)
+        ids = [p['id'] for p in data['results']]
+        while data['next']:
+            data = self.client.get(data['next']).data
+            ids.extend(p['id'] for p in data['results'])
+        self.assertEqual(ids, list(Progress.objects.order_by('-year', 'id')
+                                   .values_list('id', flat=True)))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('progress-list'),
+                                   {'format': 'json', 'cursor': 'invalid'})
+        self.assertEqual(response.status_code, 404)
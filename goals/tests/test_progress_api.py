@@ -0,0 +1,79 @@
+from unittest import mock
+import tablib
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.db.models.query import QuerySet
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from ..import_export import ProgressResource
+from ..models import Progress
+from .utils import (LOCMEM_CACHES, create_area_type, create_area,
+                    create_component, create_progress)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProgressUpsertTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.area = create_area(create_area_type(), 'A1')
+        self.component = create_component('C1')
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_superuser('admin', 'admin@example.com', 'admin'))
+
+    def post(self, **kwargs):
+        data = {'component': self.component.id, 'area': self.area.id,
+                'year': 2015, 'value': 1}
+        data.update(kwargs)
+        return self.client.post(reverse('progress-list'), data, format='json')
+
+    def test_create_then_update(self):
+        response = self.post()
+        self.assertEqual(response.status_code, 201)
+        pk = response.data['id']
+        response = self.post(value=2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], pk)
+        self.assertEqual(Progress.objects.get().value, 2)
+
+    def test_groups_are_part_of_the_key(self):
+        self.assertEqual(self.post().status_code, 201)
+        self.assertEqual(self.post(groups=['female']).status_code, 201)
+        self.assertEqual(self.post(groups=None).status_code, 200)
+        self.assertEqual(Progress.objects.count(), 2)
+
+    def test_created_concurrently(self):
+        existing = create_progress(self.component, self.area, 2015, 1)
+        first = QuerySet.first
+        calls = []
+
+        def first_missing_once(queryset):
+            # The lookup misses the row created by another request
+            calls.append(queryset)
+            return None if len(calls) == 1 else first(queryset)
+
+        with mock.patch.object(QuerySet, 'first', first_missing_once):
+            response = self.post(value=3)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], existing.id)
+        self.assertEqual(Progress.objects.get().value, 3)
+
+
+class ProgressImportTest(TestCase):
+
+    def setUp(self):
+        self.area = create_area(create_area_type(), 'A1')
+        self.component = create_component('C1')
+
+    def test_groups_delimiter(self):
+        dataset = tablib.Dataset(headers=['component', 'area', 'year', 'value', 'groups'])
+        dataset.append([self.component.id, self.area.id, 2015, 1, 'female;urban'])
+        result = ProgressResource().import_data(dataset, raise_errors=True)
+        self.assertFalse(result.has_errors())
+        self.assertEqual(Progress.objects.get().groups, ['female', 'urban'])
+        dataset = tablib.Dataset(headers=['component', 'area', 'year', 'value', 'groups'])
+        dataset.append([self.component.id, self.area.id, 2015, 2, 'female;urban'])
+        ProgressResource().import_data(dataset, raise_errors=True)
+        self.assertEqual(Progress.objects.get().value, 2)
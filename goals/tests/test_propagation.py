@@ -0,0 +1,116 @@
+from django.test import TestCase
+from ..filters import ComponentFilter, SectorFilter
+from ..models import Component, Sector
+from ..propagation import propagate
+from .utils import (create_plan, create_theme, create_goal, create_target,
+                    create_indicator, create_component, create_sector_type,
+                    create_sector, reload)
+
+
+class ComponentArraysTest(TestCase):
+
+    def setUp(self):
+        self.plan = create_plan('P1')
+        self.other_plan = create_plan('P2')
+        self.goal = create_goal(self.plan, '1')
+        self.other_goal = create_goal(self.other_plan, '2')
+        self.target = create_target(self.goal, '1.1')
+        self.indicator = create_indicator('1.1.1', target=self.target)
+        self.component = create_component('C1', [self.indicator])
+
+    def filter_components(self, **params):
+        return list(ComponentFilter(params, Component.objects.all()).qs)
+
+    def test_moved_target(self):
+        self.target.goal = self.other_goal
+        self.target.save()
+        propagate(self.target)
+        component = reload(self.component)
+        self.assertEqual(component.goals_ids, [self.other_goal.id])
+        self.assertEqual(component.plans_ids, [self.other_plan.id])
+        self.assertEqual(reload(self.indicator).plan_id, self.other_plan.id)
+        self.assertEqual(self.filter_components(goal=self.goal.id), [])
+        self.assertEqual(self.filter_components(goal=self.other_goal.id),
+                         [component])
+
+    def test_moved_goal(self):
+        self.goal.plan = self.other_plan
+        self.goal.save()
+        propagate(self.goal)
+        component = reload(self.component)
+        self.assertEqual(component.goals_ids, [self.goal.id])
+        self.assertEqual(component.plans_ids, [self.other_plan.id])
+        self.assertEqual(reload(self.target).extras['plan_code'], 'P2')
+        self.assertEqual(self.filter_components(plan=self.plan.id), [])
+        self.assertEqual(self.filter_components(plan=self.other_plan.id),
+                         [component])
+
+    def test_moved_theme(self):
+        theme = create_theme(self.plan, 'TH1')
+        indicator = create_indicator('1.1.2', theme=theme)
+        component = create_component('C2', [indicator])
+        theme.plan = self.other_plan
+        theme.save()
+        propagate(theme)
+        self.assertEqual(reload(component).plans_ids, [self.other_plan.id])
+
+    def test_removed_indicator(self):
+        self.component.indicators.remove(self.indicator)
+        component = reload(self.component)
+        self.assertEqual(component.targets_ids, [])
+        self.assertEqual(component.plans_ids, [])
+
+
+class SectorArraysTest(TestCase):
+
+    def setUp(self):
+        self.plan = create_plan('P1')
+        self.theme = create_theme(self.plan, 'TH1')
+        self.sector_type = create_sector_type()
+        self.sector = create_sector(self.sector_type, 'S1')
+
+    def filter_sectors(self, **params):
+        return list(SectorFilter(params, Sector.objects.all()).qs)
+
+    def test_added_and_removed_themes(self):
+        self.sector.themes.add(self.theme)
+        self.assertEqual(reload(self.sector).plans_ids, [self.plan.id])
+        self.sector.themes.remove(self.theme)
+        self.assertEqual(reload(self.sector).plans_ids, [])
+        self.assertEqual(self.filter_sectors(plan=self.plan.id), [])
+
+    def test_cleared_themes(self):
+        self.sector.themes.add(self.theme)
+        self.sector.themes.clear()
+        self.assertEqual(reload(self.sector).plans_ids, [])
+
+    def test_cleared_sectors(self):
+        self.theme.sectors.add(self.sector)
+        self.theme.sectors.clear()
+        self.assertEqual(reload(self.sector).plans_ids, [])
+
+    def test_deleted_theme(self):
+        self.sector.themes.add(self.theme)
+        self.theme.delete()
+        self.assertEqual(reload(self.sector).plans_ids, [])
+
+    def test_moved_sector(self):
+        child = create_sector(self.sector_type, 'S2', parent=self.sector)
+        grandchild = create_sector(self.sector_type, 'S3', parent=child)
+        other = create_sector(self.sector_type, 'S4')
+        child = reload(child)
+        child.parent = other
+        child.save()
+        propagate(child)
+        self.assertEqual(reload(child).ancestors_ids, [other.id])
+        self.assertEqual(reload(grandchild).ancestors_ids,
+                         [other.id, child.id])
+        self.assertEqual(self.filter_sectors(ancestor=self.sector.id), [])
+
+    def test_sector_moved_to(self):
+        child = create_sector(self.sector_type, 'S2', parent=self.sector)
+        grandchild = create_sector(self.sector_type, 'S3', parent=child)
+        other = create_sector(self.sector_type, 'S4')
+        reload(child).move_to(other)
+        self.assertEqual(reload(grandchild).ancestors_ids,
+                         [other.id, child.id])
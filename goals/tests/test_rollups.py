@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from ..rollups import get_rollup
+from .utils import (LOCMEM_CACHES, create_area_type, create_area,
+                    create_component, create_progress, reload)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RollupTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        area_type = create_area_type()
+        self.root = create_area(area_type, 'A1')
+        self.old_parent = create_area(area_type, 'A2', parent=self.root)
+        self.new_parent = create_area(area_type, 'A3', parent=self.root)
+        self.area = create_area(area_type, 'A4', parent=self.old_parent)
+        self.component = create_component('C1')
+        create_progress(self.component, self.area, 2015, 2)
+        create_progress(self.component, self.area, 2015, 3, groups=['female'])
+
+    def get_sums(self, area, **kwargs):
+        return [(r['year'], r['sum']) for r in get_rollup(reload(area), **kwargs)]
+
+    def test_totals_only(self):
+        self.assertEqual(self.get_sums(self.root), [(2015, 2)])
+        self.assertEqual(self.get_sums(self.root, groups=['female']),
+                         [(2015, 3)])
+
+    def test_added_progress(self):
+        self.assertEqual(self.get_sums(self.root), [(2015, 2)])
+        create_progress(self.component, self.area, 2016, 5)
+        self.assertEqual(self.get_sums(self.root), [(2015, 2), (2016, 5)])
+
+    def test_moved_progress(self):
+        self.assertEqual(self.get_sums(self.old_parent), [(2015, 2)])
+        progress = self.component.progress.get(groups=[])
+        progress.area = self.new_parent
+        progress.save()
+        self.assertEqual(self.get_sums(self.old_parent), [])
+        self.assertEqual(self.get_sums(self.new_parent), [(2015, 2)])
+
+    def test_moved_area(self):
+        self.assertEqual(self.get_sums(self.old_parent), [(2015, 2)])
+        self.assertEqual(self.get_sums(self.new_parent), [])
+        area = reload(self.area)
+        area.parent = self.new_parent
+        area.save()
+        self.assertEqual(self.get_sums(self.old_parent), [])
+        self.assertEqual(self.get_sums(self.new_parent), [(2015, 2)])
+        self.assertEqual(self.get_sums(self.root), [(2015, 2)])
+
+    def test_area_moved_to(self):
+        self.assertEqual(self.get_sums(self.old_parent), [(2015, 2)])
+        reload(self.area).move_to(self.new_parent)
+        self.assertEqual(self.get_sums(self.old_parent), [])
+        self.assertEqual(self.get_sums(self.new_parent), [(2015, 2)])
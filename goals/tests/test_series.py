@@ -0,0 +1,48 @@
+from unittest import mock
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from .utils import (LOCMEM_CACHES, create_area_type, create_area,
+                    create_component, create_progress)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SeriesTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.area = create_area(create_area_type(), 'A1')
+        self.component = create_component('C1')
+        create_progress(self.component, self.area, 2015, 1)
+        create_progress(self.component, self.area, 2017, 3)
+        create_progress(self.component, self.area, 2017, 5, groups=['female'])
+        self.client = APIClient()
+
+    def get(self, **params):
+        params.setdefault('component', self.component.id)
+        params.setdefault('format', 'json')
+        return self.client.get(reverse('progress-series'), params)
+
+    def test_series(self):
+        response = self.get(area=self.area.id)
+        self.assertEqual(response.status_code, 200)
+        series = response.data['results'][0]
+        self.assertEqual(series['years'], [2015, 2017])
+        self.assertEqual(series['values'], [1, 3])
+
+    def test_groups(self):
+        response = self.get(area=self.area.id, groups=' female, ')
+        self.assertEqual(response.data['results'][0]['values'], [5])
+
+    def test_invalidated_on_change(self):
+        self.get(area=self.area.id)
+        create_progress(self.component, self.area, 2016, 2)
+        response = self.get(area=self.area.id)
+        self.assertEqual(response.data['results'][0]['years'], [2015, 2016, 2017])
+
+    @mock.patch('goals.api.views.SERIES_MAX_AREAS', 2)
+    def test_too_many_areas(self):
+        response = self.get(area='%d,2,3' % self.area.id)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('area', response.data)
@@ -0,0 +1,72 @@
+from ..models import (AreaType, Area, Plan, Theme, SectorType, Sector, Goal,
+                      Target, Indicator, Component, Progress)
+
+
+def create_plan(code='P1', **kwargs):
+    kwargs.setdefault('name', 'Plan %s' % code)
+    return Plan.objects.create(code=code, **kwargs)
+
+
+def create_theme(plan, code='TH1', **kwargs):
+    kwargs.setdefault('name', 'Theme %s' % code)
+    return Theme.objects.create(plan=plan, code=code, **kwargs)
+
+
+def create_goal(plan, code='1', **kwargs):
+    kwargs.setdefault('name', 'Goal %s' % code)
+    return Goal.objects.create(plan=plan, code=code, **kwargs)
+
+
+def create_target(goal, code='1.1', **kwargs):
+    kwargs.setdefault('name', 'Target %s' % code)
+    return Target.objects.create(goal=goal, code=code, **kwargs)
+
+
+def create_indicator(code='1.1.1', **kwargs):
+    kwargs.setdefault('name', 'Indicator %s' % code)
+    return Indicator.objects.create(code=code, **kwargs)
+
+
+def create_component(code='C1', indicators=(), **kwargs):
+    kwargs.setdefault('name', 'Component %s' % code)
+    component = Component.objects.create(code=code, **kwargs)
+    if indicators:
+        component.indicators.add(*indicators)
+    return component
+
+
+def create_sector_type(code='ST1', **kwargs):
+    kwargs.setdefault('name', 'Sector type %s' % code)
+    return SectorType.objects.create(code=code, **kwargs)
+
+
+def create_sector(sector_type, code='S1', **kwargs):
+    kwargs.setdefault('name', 'Sector %s' % code)
+    return Sector.objects.create(type=sector_type, code=code, **kwargs)
+
+
+def create_area_type(code='AT1', **kwargs):
+    kwargs.setdefault('name', 'Area type %s' % code)
+    return AreaType.objects.create(code=code, **kwargs)
+
+
+def create_area(area_type, code='A1', **kwargs):
+    kwargs.setdefault('name', 'Area %s' % code)
+    return Area.objects.create(type=area_type, code=code, **kwargs)
+
+
+def create_progress(component, area, year=2015, value=1, **kwargs):
+    return Progress.objects.create(component=component, area=area,
+                                   year=year, value=value, **kwargs)
+
+
+def reload(obj):
+    return obj.__class__._default_manager.get(pk=obj.pk)
+
+
+# Tests don't depend on a running cache server
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
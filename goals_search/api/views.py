@@ -1,12 +1,35 @@
+import hashlib
+import json
 from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import get_language
 from haystack.inputs import Raw
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from drf_haystack.viewsets import HaystackViewSet
 from haystack_es.query import SearchQuerySet
+from goals.api.mixins import record_cache_metric
 from .serializers import SearchResultSerializer
 from .pagination import SearchPagination
 from ..filters import SimpleFilterBackend
+from ..generations import get_search_generation
+from ..postgres import PostgresSearchQuerySet
+from ..search_indexes import BOOST_FIELDS
+
+
+SEARCH_BACKEND = getattr(settings, 'GOALS_SEARCH_BACKEND', 'elasticsearch')
+
+SEARCH_CACHE_TIMEOUT = getattr(settings, 'GOALS_SEARCH_CACHE_TIMEOUT', 5 * 60)
+
+FACET_CACHE_TIMEOUT = getattr(settings, 'GOALS_SEARCH_FACET_CACHE_TIMEOUT', 60 * 60)
+
+
+def normalize_query(q):
+    """Collapse the whitespace of a search query. Case is kept since
+    queries may match case sensitive fields.
+    """
+    return ' '.join((q or '').split())
 
 
 Plan = apps.get_registered_model('goals', 'Plan')
@@ -41,31 +64,17 @@ class SearchViewSet(HaystackViewSet):
         'created', 'last_modified',
         'progress_count__gt', 'progress_count__lt',
         'progress_count__gte', 'progress_count__lte']
-    boost_fields = {
-        'code': 1.5,
-        'name': 3,
-        'caption': 1.5,
-        'description': 1,
-        'plan_name': 1,
-        'plan_code': 1,
-        'plans_names': 1,
-        'plans_codes': 1,
-        'theme_name': 1,
-        'themes_names': 1,
-        'goal_name': 1,
-        'goals_names': 1,
-        'target_name': 1,
-        'targets_names': 1,
-        'indicators_names': 1,
-        'sector_name': 1,
-        'sectors_names': 1,
-        'parent_name': 1,
-        'data_source': 1,
-        'agency': 1,
-    }
+    boost_fields = BOOST_FIELDS
 
     def get_queryset(self, index_models=[]):
-        q = self.request.query_params.get('q', None)
+        # The normalised query is part of the cache keys
+        q = normalize_query(self.request.query_params.get('q', None))
+        if SEARCH_BACKEND == 'postgres':
+            queryset = PostgresSearchQuerySet().facet('object_type')
+            if q:
+                # Ranked with weights mirroring boost_fields
+                return queryset.filter(content=q)
+            return queryset
         if q:
             return SearchQuerySet()\
                 .filter(content=Raw(q))\
@@ -73,14 +82,51 @@ class SearchViewSet(HaystackViewSet):
                 .facet('object_type')
         return SearchQuerySet().facet('object_type')
 
+    def get_cache_key(self, request, kind, *parts):
+        """Return the cache key of search ``kind`` data of the request,
+        made of the normalised query, filters, language, search
+        generation and ``parts``.
+        """
+        filters = [(k, v) for k, v in sorted(request.query_params.lists())
+                   if k in self.filter_fields]
+        parts = [
+            normalize_query(request.query_params.get('q')),
+            filters,
+            get_language(),
+            get_search_generation(),
+        ] + list(parts)
+        digest = hashlib.md5(json.dumps(parts).encode('utf-8')).hexdigest()
+        return 'goals_search:%s:%s' % (kind, digest)
+
+    def get_facets(self, request, queryset):
+        key = self.get_cache_key(request, 'facets')
+        facets = cache.get(key)
+        if facets is None:
+            facets = queryset.facet_counts()
+            cache.set(key, facets, FACET_CACHE_TIMEOUT)
+        return facets
+
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(queryset)
-        if page is not None:
+        view_name = self.__class__.__name__
+        page_number = request.query_params.get(self.paginator.page_query_param) or '1'
+        key = self.get_cache_key(
+            request, 'results', page_number, request.accepted_renderer.format)
+        data = cache.get(key)
+        if data is not None:
+            record_cache_metric(view_name, 'hit')
+            cache_status = 'HIT'
+        else:
+            record_cache_metric(view_name, 'miss')
+            cache_status = 'MISS'
+            page = self.paginate_queryset(queryset)
+            if page is None:
+                serializer = self.get_serializer(queryset, many=True)
+                return Response(serializer.data)
             serializer = self.get_serializer(page, many=True)
-            response = self.get_paginated_response(serializer.data)
-            response.data['facets'] = queryset.facet_counts()
-            return response
-
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+            data = self.get_paginated_response(serializer.data).data
+            cache.set(key, data, SEARCH_CACHE_TIMEOUT)
+        data['facets'] = self.get_facets(request, queryset)
+        response = Response(data)
+        response['X-Cache'] = cache_status
+        return response
@@ -0,0 +1,110 @@
+from django.conf import settings
+from elasticsearch.helpers import bulk, parallel_bulk
+from haystack import connections
+from haystack.constants import ID
+from haystack.exceptions import NotHandled
+from .generations import bump_search_generation
+
+
+BULK_CHUNK_SIZE = getattr(settings, 'GOALS_SEARCH_BULK_CHUNK_SIZE', 500)
+
+BULK_THREAD_COUNT = getattr(settings, 'GOALS_SEARCH_BULK_THREAD_COUNT', 4)
+
+
+def get_indexes(using='default', models=None):
+    unified_index = connections[using].get_unified_index()
+    if not models:
+        return unified_index.collect_indexes()
+    indexes = []
+    for model in models:
+        try:
+            indexes.append(unified_index.get_index(model))
+        except NotHandled:
+            pass
+    return indexes
+
+
+def iter_chunks(queryset, chunk_size=BULK_CHUNK_SIZE):
+    """Yield lists of objects of ``queryset`` ordered by primary key.
+
+    Chunks are read with a primary key range instead of ``OFFSET`` and
+    the related objects of every chunk are prefetched together.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        chunk = queryset
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        yield chunk
+
+
+def build_document(index, backend, obj):
+    """Build the Elasticsearch document of ``obj`` the same way the
+    haystack backend does in ``update()``.
+    """
+    prepared = index.full_prepare(obj)
+    document = dict((key, backend._from_python(value))
+                    for key, value in prepared.items())
+    document['_id'] = document[ID]
+    return document
+
+
+def iter_documents(index, backend, using='default', chunk_size=BULK_CHUNK_SIZE,
+                   pks=None, start_date=None):
+    queryset = index.build_queryset(using=using, start_date=start_date)
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    for chunk in iter_chunks(queryset, chunk_size):
+        for obj in chunk:
+            yield build_document(index, backend, obj)
+
+
+def bulk_index(using='default', models=None, chunk_size=BULK_CHUNK_SIZE,
+               thread_count=BULK_THREAD_COUNT, index_name=None, pks=None,
+               start_date=None):
+    """Index all objects of ``models`` (all indexed models by default)
+    with the Elasticsearch bulk API using ``thread_count`` workers.
+    ``pks`` and ``start_date`` limit the indexed objects.
+
+    Documents are written to ``index_name`` when given, otherwise to
+    the index of the connection. Returns ``(indexed, errors)``.
+    """
+    backend = connections[using].get_backend()
+    if index_name is None and not backend.setup_complete:
+        backend.setup()
+    indexed, errors = 0, []
+    for index in get_indexes(using, models):
+        documents = iter_documents(index, backend, using, chunk_size, pks,
+                                   start_date)
+        results = parallel_bulk(
+            backend.conn, documents,
+            index=index_name or backend.index_name, doc_type='modelresult',
+            thread_count=thread_count, chunk_size=chunk_size,
+            raise_on_error=False)
+        for ok, item in results:
+            if ok:
+                indexed += 1
+            else:
+                errors.append(item)
+    bump_search_generation()
+    return indexed, errors
+
+
+def bulk_remove(model, pks, using='default', index_name=None):
+    """Remove the documents of ``model`` objects with the given
+    primary keys with a single bulk request.
+    """
+    backend = connections[using].get_backend()
+    actions = ({
+        '_op_type': 'delete',
+        '_id': '%s.%s' % (model._meta.label_lower, pk),
+    } for pk in pks)
+    # Documents which are not indexed are reported as errors, ignore them
+    bulk(backend.conn, actions, index=index_name or backend.index_name,
+         doc_type='modelresult', raise_on_error=False)
+    bump_search_generation()
@@ -0,0 +1,29 @@
+import time
+from django.core.cache import cache
+
+
+# The search generation is bumped whenever documents are written to or
+# removed from the search index, invalidating cached search results.
+
+SEARCH_GENERATION_KEY = 'goals_search:generation'
+
+
+def _initial():
+    # Never restart from a previously used value when the counter
+    # gets evicted from the cache.
+    return int(time.time() * 1000)
+
+
+def get_search_generation():
+    generation = cache.get(SEARCH_GENERATION_KEY)
+    if generation is None:
+        cache.add(SEARCH_GENERATION_KEY, _initial(), None)
+        generation = cache.get(SEARCH_GENERATION_KEY)
+    return generation
+
+
+def bump_search_generation():
+    try:
+        cache.incr(SEARCH_GENERATION_KEY)
+    except ValueError:
+        cache.set(SEARCH_GENERATION_KEY, _initial(), None)
@@ -0,0 +1,30 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from goals_search.bulk import BULK_CHUNK_SIZE, get_indexes
+from goals_search.postgres import update_documents
+
+
+class Command(BaseCommand):
+    help = 'Build the search documents of the PostgreSQL search backend.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', metavar='app_label.ModelName',
+                            help='Models to index, all indexed models by default')
+        parser.add_argument('--using', default='default',
+                            help='Haystack connection of the search indexes')
+        parser.add_argument('--chunk-size', type=int, default=BULK_CHUNK_SIZE,
+                            help='Number of objects per query and bulk insert')
+
+    def handle(self, *args, **options):
+        try:
+            models = [apps.get_model(label) for label in options['models']]
+        except (LookupError, ValueError) as e:
+            raise CommandError(e)
+        if not models:
+            models = [index.get_model()
+                      for index in get_indexes(options['using'])]
+        for model in models:
+            count = update_documents(model, using=options['using'],
+                                     chunk_size=options['chunk_size'])
+            self.stdout.write('%s: %d objects' % (model._meta.label, count))
+        self.stdout.write(self.style.SUCCESS('Search documents built'))
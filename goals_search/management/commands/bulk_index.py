@@ -0,0 +1,32 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from goals_search.bulk import BULK_CHUNK_SIZE, BULK_THREAD_COUNT, bulk_index
+
+
+class Command(BaseCommand):
+    help = 'Index all searchable objects with the Elasticsearch bulk API ' \
+           'using parallel workers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', metavar='app_label.ModelName',
+                            help='Models to index, all indexed models by default')
+        parser.add_argument('--using', default='default',
+                            help='Haystack connection to use')
+        parser.add_argument('--chunk-size', type=int, default=BULK_CHUNK_SIZE,
+                            help='Number of objects per query and bulk request')
+        parser.add_argument('--workers', type=int, default=BULK_THREAD_COUNT,
+                            help='Number of parallel bulk request threads')
+
+    def handle(self, *args, **options):
+        try:
+            models = [apps.get_model(label) for label in options['models']]
+        except (LookupError, ValueError) as e:
+            raise CommandError(e)
+        indexed, errors = bulk_index(
+            using=options['using'], models=models,
+            chunk_size=options['chunk_size'],
+            thread_count=options['workers'])
+        for error in errors[:20]:
+            self.stderr.write(str(error))
+        self.stdout.write(self.style.SUCCESS(
+            'Indexed %d documents, %d errors' % (indexed, len(errors))))
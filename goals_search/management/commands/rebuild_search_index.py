@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from goals_search.bulk import BULK_CHUNK_SIZE, BULK_THREAD_COUNT
+from goals_search.rebuild import INDEX_GRACE_PERIOD, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search index into a new index and switch the ' \
+           'index alias to it without downtime.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--using', default='default',
+                            help='Haystack connection to use')
+        parser.add_argument('--chunk-size', type=int, default=BULK_CHUNK_SIZE,
+                            help='Number of objects per query and bulk request')
+        parser.add_argument('--workers', type=int, default=BULK_THREAD_COUNT,
+                            help='Number of parallel bulk request threads')
+        parser.add_argument('--grace-period', type=int, default=INDEX_GRACE_PERIOD,
+                            help='Seconds to keep the previous index before deleting it')
+        parser.add_argument('--keep-old', action='store_true',
+                            help='Do not delete the previous index')
+
+    def handle(self, *args, **options):
+        name, indexed, errors, old_indexes = rebuild_index(
+            using=options['using'], chunk_size=options['chunk_size'],
+            thread_count=options['workers'],
+            grace_period=None if options['keep_old'] else options['grace_period'])
+        for error in errors[:20]:
+            self.stderr.write(str(error))
+        if name is None:
+            raise CommandError(
+                'Indexing failed with %d errors, the alias was not switched' % len(errors))
+        self.stdout.write(self.style.SUCCESS(
+            'Indexed %d documents into %s, %d errors' % (indexed, name, len(errors))))
+        if old_indexes:
+            self.stdout.write('Previous indexes: %s' % ', '.join(old_indexes))
@@ -0,0 +1,36 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.utils.translation import ugettext_lazy as _
+
+
+class SearchDocument(models.Model):
+    """Search index document of an object in one language, used by the
+    PostgreSQL search backend, see ``goals_search.postgres``.
+
+    ``data`` holds the fields prepared by the haystack search index and
+    ``search_vector`` the weighted text search vector built from them.
+    """
+    document_id = models.CharField(max_length=255)
+    object_type = models.CharField(max_length=50)
+    object_id = models.IntegerField()
+    language = models.CharField(max_length=10)
+    data = JSONField(default=dict, encoder=DjangoJSONEncoder)
+    search_vector = SearchVectorField(null=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _('Search document')
+        verbose_name_plural = _('Search documents')
+        unique_together = ['document_id', 'language']
+        indexes = [
+            GinIndex(fields=['search_vector'],
+                     name='goals_searc_search_vector_gin'),
+            models.Index(fields=['language', 'object_type'],
+                         name='goals_searc_language_type'),
+        ]
+
+    def __str__(self):
+        return '%s:%s' % (self.document_id, self.language)
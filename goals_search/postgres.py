@@ -0,0 +1,230 @@
+"""PostgreSQL full-text search backend.
+
+Objects are stored as one ``SearchDocument`` per language with the
+fields prepared by their haystack search index. The text search vector
+of a document is built from the rendered ``*_text.txt`` template and
+the boosted fields, weighted after their boosts.
+"""
+from django.conf import settings
+from django.contrib.postgres.fields.jsonb import KeyTextTransform
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q
+from django.db.models.functions import Cast
+from django.utils import six, timezone, translation
+from haystack.constants import ID, DJANGO_CT, DJANGO_ID
+from haystack.models import SearchResult
+from .bulk import BULK_CHUNK_SIZE, get_indexes, iter_chunks
+from .generations import bump_search_generation
+from .models import SearchDocument
+from .search_indexes import BOOST_FIELDS
+
+
+# Text search configuration of each language, ``simple`` by default
+TEXT_SEARCH_CONFIGS = getattr(settings, 'GOALS_SEARCH_TEXT_CONFIGS',
+                              {'en': 'english'})
+
+# Lowest boost of each text search weight, the document text gets 'D'
+WEIGHTS = [('A', 3), ('B', 1.5), ('C', 0)]
+
+RANGE_LOOKUPS = ['gt', 'gte', 'lt', 'lte']
+
+
+def get_languages():
+    return [code for code, name in settings.LANGUAGES]
+
+
+def get_search_language():
+    language = translation.get_language()
+    if language not in get_languages():
+        return settings.LANGUAGE_CODE
+    return language
+
+
+def get_text_config(language):
+    return TEXT_SEARCH_CONFIGS.get(language, 'simple')
+
+
+def get_weight(boost):
+    for weight, lowest in WEIGHTS:
+        if boost >= lowest:
+            return weight
+
+
+def get_search_vector(language):
+    """Return the weighted search vector expression of the documents
+    of ``language``.
+    """
+    config = get_text_config(language)
+    vector = SearchVector(KeyTextTransform('text', 'data'),
+                          weight='D', config=config)
+    for field, boost in sorted(BOOST_FIELDS.items()):
+        vector = vector + SearchVector(KeyTextTransform(field, 'data'),
+                                       weight=get_weight(boost), config=config)
+    return vector
+
+
+def build_documents(index, objects, language):
+    documents = []
+    with translation.override(language):
+        for obj in objects:
+            data = index.full_prepare(obj)
+            documents.append(SearchDocument(
+                document_id=data[ID], object_type=obj._meta.model_name,
+                object_id=obj.pk, language=language, data=data))
+    return documents
+
+
+def get_documents(model, pks):
+    return SearchDocument.objects\
+        .filter(object_type=model._meta.model_name, object_id__in=pks)
+
+
+def remove_documents(model, pks):
+    get_documents(model, pks).delete()
+    bump_search_generation()
+
+
+def update_documents(model, pks=None, using='default',
+                     chunk_size=BULK_CHUNK_SIZE):
+    """Write the search documents of ``model`` objects in every language
+    and remove the ones of objects which are no longer indexed.
+
+    All objects are updated when ``pks`` is not given. Returns the
+    number of updated objects.
+    """
+    indexes = get_indexes(using, [model])
+    if not indexes:
+        return 0
+    index = indexes[0]
+    queryset = index.build_queryset(using=using)
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    started, count, indexed = timezone.now(), 0, set()
+    for chunk in iter_chunks(queryset, chunk_size):
+        with transaction.atomic():
+            get_documents(model, [obj.pk for obj in chunk]).delete()
+            for language in get_languages():
+                documents = build_documents(index, chunk, language)
+                SearchDocument.objects.bulk_create(documents)
+                SearchDocument.objects\
+                    .filter(language=language,
+                            document_id__in=[d.document_id for d in documents])\
+                    .update(search_vector=get_search_vector(language))
+        count += len(chunk)
+        indexed.update(obj.pk for obj in chunk)
+    if pks is not None:
+        removed = [pk for pk in pks if pk not in indexed]
+        if removed:
+            get_documents(model, removed).delete()
+    else:
+        SearchDocument.objects\
+            .filter(object_type=model._meta.model_name, updated__lt=started)\
+            .delete()
+    bump_search_generation()
+    return count
+
+
+class PostgresSearchQuerySet(object):
+    """The part of the haystack ``SearchQuerySet`` API used by the search
+    API, backed by the search documents of the active language.
+
+    ``content`` filters are matched against the search vectors and
+    results are ordered by rank. Other filters match prepared fields
+    case insensitively, or any item of multi valued fields.
+    """
+
+    def __init__(self, language=None):
+        self.language = language or get_search_language()
+        self.queryset = SearchDocument.objects.filter(language=self.language)
+        self.facets = []
+        self.ranked = False
+
+    def _clone(self, queryset):
+        clone = self.__class__(self.language)
+        clone.queryset = queryset
+        clone.facets = list(self.facets)
+        clone.ranked = self.ranked
+        return clone
+
+    def search(self, text):
+        query = SearchQuery(text, config=get_text_config(self.language))
+        queryset = self.queryset\
+            .filter(search_vector=query)\
+            .annotate(rank=SearchRank(F('search_vector'), query))
+        clone = self._clone(queryset)
+        clone.ranked = True
+        return clone
+
+    def filter(self, **kwargs):
+        clone = self
+        for key, value in kwargs.items():
+            if key == 'content':
+                clone = clone.search(value)
+            else:
+                clone = clone._clone(clone.filter_field(key, value))
+        return clone
+
+    def filter_field(self, key, value):
+        field, __, lookup = key.partition('__')
+        alias = 'filter_%s' % field
+        if lookup in RANGE_LOOKUPS:
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                return self.queryset.none()
+            return self.queryset\
+                .annotate(**{alias: Cast(KeyTextTransform(field, 'data'), FloatField())})\
+                .filter(**{'%s__%s' % (alias, lookup): value})
+        values = [value]
+        if isinstance(value, six.string_types) and value.isdigit():
+            values.append(int(value))
+        condition = Q(**{'%s__iexact' % alias: value})
+        for v in values:
+            condition |= Q(**{'data__%s__contains' % field: [v]})
+        return self.queryset\
+            .annotate(**{alias: KeyTextTransform(field, 'data')})\
+            .filter(condition)
+
+    def facet(self, field):
+        clone = self._clone(self.queryset)
+        clone.facets.append(field)
+        return clone
+
+    def facet_counts(self):
+        fields = {}
+        for field in self.facets:
+            counts = self.queryset.order_by()\
+                .annotate(facet=KeyTextTransform(field, 'data'))\
+                .values('facet')\
+                .annotate(count=Count('id'))\
+                .order_by('-count', 'facet')
+            fields[field] = [(c['facet'], c['count']) for c in counts]
+        return {'fields': fields, 'dates': {}, 'queries': {}}
+
+    def get_ordered(self):
+        if self.ranked:
+            return self.queryset.order_by('-rank', 'id')
+        return self.queryset.order_by('id')
+
+    def count(self):
+        return self.queryset.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self.to_result(d) for d in self.get_ordered()[k]]
+        return self.to_result(self.get_ordered()[k])
+
+    def to_result(self, document):
+        data = dict(document.data)
+        app_label, model_name = data.pop(DJANGO_CT).split('.')
+        for key in [ID, DJANGO_ID]:
+            data.pop(key, None)
+        return SearchResult(app_label, model_name, document.object_id,
+                            getattr(document, 'rank', 0), **data)
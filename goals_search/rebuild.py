@@ -0,0 +1,154 @@
+import copy
+from django.conf import settings
+from django.utils import timezone
+from elasticsearch.helpers import scan
+from haystack import connections
+from haystack.constants import DJANGO_CT, DJANGO_ID
+from .bulk import (BULK_CHUNK_SIZE, BULK_THREAD_COUNT, bulk_index, bulk_remove,
+                   get_indexes)
+from .generations import bump_search_generation
+
+
+INDEX_GRACE_PERIOD = getattr(settings, 'GOALS_SEARCH_INDEX_GRACE_PERIOD', 3600)
+
+# Settings applied while loading a new index
+BUILD_SETTINGS = {'refresh_interval': '-1', 'number_of_replicas': 0}
+
+DEFAULT_SETTINGS = {'refresh_interval': '1s', 'number_of_replicas': 1}
+
+
+def get_alias_indexes(conn, alias):
+    """Return the names of the indexes ``alias`` points to.
+    """
+    if not conn.indices.exists_alias(name=alias):
+        return []
+    return list(conn.indices.get_alias(name=alias).keys())
+
+
+def get_index_settings(conn, indexes):
+    """Return the refresh interval and replica count of the first of
+    ``indexes`` or the defaults when there are none.
+    """
+    live = dict(DEFAULT_SETTINGS)
+    if indexes:
+        index_settings = conn.indices.get_settings(index=indexes[0])
+        index_settings = index_settings[indexes[0]]['settings']['index']
+        for key in live:
+            live[key] = index_settings.get(key, live[key])
+    return live
+
+
+def create_index(backend, using, name):
+    """Create ``name`` with the analysis settings and field mapping the
+    haystack backend would create, and with refresh and replicas off.
+    """
+    unified_index = connections[using].get_unified_index()
+    content_field_name, field_mapping = backend.build_schema(
+        unified_index.all_searchfields())
+    body = copy.deepcopy(backend.DEFAULT_SETTINGS)
+    body.setdefault('settings', {}).update(BUILD_SETTINGS)
+    backend.conn.indices.create(index=name, body=body)
+    backend.conn.indices.put_mapping(
+        index=name, doc_type='modelresult',
+        body={'modelresult': {'date_detection': False,
+                              'properties': field_mapping}})
+
+
+def swap_alias(conn, alias, name, old_indexes):
+    """Point ``alias`` to ``name`` only, in a single atomic request.
+
+    A concrete index named like the alias, as created before aliases
+    were used, is deleted in the same request.
+    """
+    actions = [{'remove': {'index': index, 'alias': alias}}
+               for index in old_indexes]
+    if not old_indexes and conn.indices.exists(index=alias):
+        actions.append({'remove_index': {'index': alias}})
+    actions.append({'add': {'index': name, 'alias': alias}})
+    conn.indices.update_aliases(body={'actions': actions})
+
+
+def iter_document_pks(conn, name, model, chunk_size=BULK_CHUNK_SIZE):
+    """Yield lists of the primary keys of ``model`` documents in the
+    index ``name``.
+    """
+    hits = scan(conn, index=name, doc_type='modelresult', size=chunk_size,
+                query={'query': {'term': {DJANGO_CT: model._meta.label_lower}},
+                       '_source': [DJANGO_ID]})
+    pks = []
+    for hit in hits:
+        pks.append(hit['_source'][DJANGO_ID])
+        if len(pks) >= chunk_size:
+            yield pks
+            pks = []
+    if pks:
+        yield pks
+
+
+def remove_stale_documents(using, name, chunk_size=BULK_CHUNK_SIZE):
+    """Remove the documents of objects which no longer exist or are no
+    longer indexed from the index ``name``. Returns their number.
+    """
+    backend = connections[using].get_backend()
+    removed = 0
+    for index in get_indexes(using):
+        model = index.get_model()
+        for pks in iter_document_pks(backend.conn, name, model, chunk_size):
+            existing = set(
+                str(pk) for pk in index.build_queryset(using=using)
+                .filter(pk__in=pks).values_list('pk', flat=True))
+            stale = [pk for pk in pks if pk not in existing]
+            if stale:
+                bulk_remove(model, stale, using=using, index_name=name)
+                removed += len(stale)
+    return removed
+
+
+def rebuild_index(using='default', chunk_size=BULK_CHUNK_SIZE,
+                  thread_count=BULK_THREAD_COUNT,
+                  grace_period=INDEX_GRACE_PERIOD):
+    """Build the search index of a connection into a new timestamped
+    index and switch the connection's index name, used as an alias,
+    to it once loaded.
+
+    Objects updated while loading are indexed again after the switch
+    and the documents of objects deleted meanwhile are removed.
+    The previous indexes are deleted after ``grace_period`` seconds,
+    or left in place when it is ``None``.
+
+    Returns ``(name, indexed, errors, old_indexes)`` where ``name`` is
+    ``None`` when the load failed and the new index was dropped.
+    """
+    from .tasks import delete_search_indexes
+
+    backend = connections[using].get_backend()
+    conn, alias = backend.conn, backend.index_name
+    started = timezone.now()
+    name = '%s_%s' % (alias, started.strftime('%Y%m%d%H%M%S'))
+    old_indexes = get_alias_indexes(conn, alias)
+    live_settings = get_index_settings(conn, old_indexes)
+
+    create_index(backend, using, name)
+    indexed, errors = bulk_index(
+        using=using, chunk_size=chunk_size, thread_count=thread_count,
+        index_name=name)
+    conn.indices.put_settings(index=name, body={'index': live_settings})
+    conn.indices.refresh(index=name)
+
+    if errors:
+        conn.indices.delete(index=name)
+        return None, indexed, errors, old_indexes
+
+    swap_alias(conn, alias, name, old_indexes)
+    bump_search_generation()
+    # Changes written to the previous index during the load
+    caught_up, errors = bulk_index(
+        using=using, chunk_size=chunk_size, thread_count=thread_count,
+        index_name=name, start_date=started)
+    # Deletes written to the previous index during the load
+    remove_stale_documents(using, name, chunk_size)
+    if old_indexes and grace_period is not None:
+        delete_search_indexes.apply_async(
+            (using, old_indexes), countdown=grace_period,
+            queue=getattr(settings, 'CELERY_HAYSTACK_QUEUE', None))
+    return name, indexed + caught_up, errors, old_indexes
@@ -1,5 +1,4 @@
 from django.apps import apps
-from django.db.models import Count
 from haystack_es import indexes
 
 Plan = apps.get_registered_model('goals', 'Plan')
@@ -10,6 +9,30 @@ Target = apps.get_registered_model('goals', 'Target')
 Indicator = apps.get_registered_model('goals', 'Indicator')
 Component = apps.get_registered_model('goals', 'Component')
 
+# Query time boosts of the fields matched by search queries
+BOOST_FIELDS = {
+    'code': 1.5,
+    'name': 3,
+    'caption': 1.5,
+    'description': 1,
+    'plan_name': 1,
+    'plan_code': 1,
+    'plans_names': 1,
+    'plans_codes': 1,
+    'theme_name': 1,
+    'themes_names': 1,
+    'goal_name': 1,
+    'goals_names': 1,
+    'target_name': 1,
+    'targets_names': 1,
+    'indicators_names': 1,
+    'sector_name': 1,
+    'sectors_names': 1,
+    'parent_name': 1,
+    'data_source': 1,
+    'agency': 1,
+}
+
 
 class BaseIndex(indexes.CelerySearchIndex):
     text = indexes.CharField(document=True, use_template=True)
@@ -41,7 +64,7 @@ class BaseIndex(indexes.CelerySearchIndex):
 class SectorIndex(BaseIndex, indexes.Indexable):
     parent = indexes.IntegerField(model_attr='parent_id', null=True,
                                   faceted=True)
-    parent_name = indexes.CharField(model_attr='parent__name', null=True,
+    parent_name = indexes.CharField(model_attr='parent_name', null=True,
                                     faceted=True)
     level = indexes.IntegerField(model_attr='level', null=True, faceted=True)
     themes_ids = indexes.MultiValueField(faceted=True, null=True)
@@ -59,8 +82,12 @@ class SectorIndex(BaseIndex, indexes.Indexable):
     def get_model(self):
         return Sector
 
-    def prepare_indicators(self, obj):
-        return list(obj.themes.values_list('id', flat=True))
+    def index_queryset(self, using=None):
+        return self.get_model().objects.prefetch_related('themes')
+
+    def prepare_themes_ids(self, obj):
+        # Uses the themes prefetched by index_queryset
+        return [theme.id for theme in obj.themes.all()]
 
 
 class PlanIndex(BaseIndex, indexes.Indexable):
@@ -82,6 +109,9 @@ class ThemeIndex(BaseIndex, indexes.Indexable):
     def get_model(self):
         return Theme
 
+    def index_queryset(self, using=None):
+        return self.get_model().objects.select_related('plan')
+
 
 class GoalIndex(ThemeIndex):
 
@@ -151,12 +181,8 @@ class IndicatorIndex(TargetIndex, indexes.Indexable):
     def get_model(self):
         return Indicator
 
-    def index_queryset(self, using=None):
-        return self.get_model().objects.annotate(
-            progress_count=Count('components__progress'))
-
     def prepare_progress_count(self, obj):
-        return obj.get_progress_count()
+        return obj.progress_count
 
 
 class ComponentIndex(BaseIndex, indexes.Indexable):
@@ -195,11 +221,11 @@ class ComponentIndex(BaseIndex, indexes.Indexable):
         return Component
 
     def index_queryset(self, using=None):
-        return self.get_model().objects.annotate(
-            progress_count=Count('progress'))
+        return self.get_model().objects.prefetch_related('indicators')
 
     def prepare_indicators(self, obj):
-        return list(obj.indicators.values_list('id', flat=True))
+        # Uses the indicators prefetched by index_queryset
+        return [indicator.id for indicator in obj.indicators.all()]
 
     def prepare_progress_count(self, obj):
-        return obj.get_progress_count()
+        return obj.progress_count
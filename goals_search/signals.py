@@ -0,0 +1,85 @@
+import functools
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import signals
+from haystack.exceptions import NotHandled
+from haystack.signals import BaseSignalProcessor
+
+
+class CoalescingSignalProcessor(BaseSignalProcessor):
+    """Collects the saved and deleted objects of every transaction and
+    dispatches one batched index task per model and action after the
+    transaction commits.
+
+    Objects saved outside a transaction are dispatched immediately.
+    Nothing is dispatched for rolled back transactions.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._local = threading.local()
+        super(CoalescingSignalProcessor, self).__init__(*args, **kwargs)
+
+    def setup(self):
+        signals.post_save.connect(self.handle_save)
+        signals.post_delete.connect(self.handle_delete)
+
+    def teardown(self):
+        signals.post_save.disconnect(self.handle_save)
+        signals.post_delete.disconnect(self.handle_delete)
+
+    def is_indexed(self, model):
+        for using in self.connection_router.for_write():
+            try:
+                self.connections[using].get_unified_index().get_index(model)
+            except NotHandled:
+                continue
+            return True
+        return False
+
+    def get_buffer(self):
+        """Return the buffer of the current transaction, registering
+        its flush on commit when it is new.
+        """
+        connection = transaction.get_connection()
+        callback = getattr(self._local, 'callback', None)
+        pending = callback is not None and any(
+            func is callback for savepoints, func in connection.run_on_commit)
+        if not pending:
+            # The previous transaction has been committed or rolled back
+            buffer = {'update': defaultdict(set), 'delete': defaultdict(set)}
+            callback = functools.partial(self.flush, buffer)
+            self._local.buffer, self._local.callback = buffer, callback
+            transaction.on_commit(callback)
+        return self._local.buffer
+
+    def add(self, action, sender, instance):
+        if not self.is_indexed(sender):
+            return
+        if transaction.get_connection().in_atomic_block:
+            buffer = self.get_buffer()
+            buffer[action][sender._meta.label].add(instance.pk)
+            if action == 'delete':
+                buffer['update'][sender._meta.label].discard(instance.pk)
+        else:
+            self.flush({action: {sender._meta.label: set([instance.pk])}})
+
+    def flush(self, buffer):
+        from .tasks import update_search_index, remove_from_search_index
+        queue = getattr(settings, 'CELERY_HAYSTACK_QUEUE', None)
+        tasks = {
+            'update': update_search_index,
+            'delete': remove_from_search_index,
+        }
+        for action, models in buffer.items():
+            for model_label, pks in models.items():
+                if pks:
+                    tasks[action].apply_async(
+                        (model_label, sorted(pks)), queue=queue)
+
+    def handle_save(self, sender, instance, **kwargs):
+        self.add('update', sender, instance)
+
+    def handle_delete(self, sender, instance, **kwargs):
+        self.add('delete', sender, instance)
@@ -0,0 +1,71 @@
+from celery import shared_task
+from django.apps import apps
+from django.conf import settings
+from haystack import connection_router, connections
+from .bulk import get_indexes, bulk_index, bulk_remove
+from .postgres import update_documents, remove_documents
+from .rebuild import get_alias_indexes
+
+
+SEARCH_BACKEND = getattr(settings, 'GOALS_SEARCH_BACKEND', 'elasticsearch')
+
+
+def is_indexed(model):
+    return any(get_indexes(using, [model])
+               for using in connection_router.for_write())
+
+
+def queue_index_update(model, pks):
+    """Queue the index update of ``model`` objects changed without
+    saving them, e.g. with a queryset update.
+    """
+    if pks:
+        update_search_index.apply_async(
+            (model._meta.label, sorted(pks)),
+            queue=getattr(settings, 'CELERY_HAYSTACK_QUEUE', None))
+
+
+@shared_task
+def update_search_index(model_label, pks):
+    """Index the objects of a model in bulk and remove the ones which
+    no longer exist or are excluded from the index queryset.
+    """
+    model = apps.get_model(model_label)
+    if SEARCH_BACKEND == 'postgres':
+        update_documents(model, pks)
+        return
+    for using in connection_router.for_write():
+        indexes = get_indexes(using, [model])
+        if not indexes:
+            continue
+        bulk_index(using=using, models=[model], pks=pks)
+        indexed = set(indexes[0].build_queryset(using=using)
+                      .filter(pk__in=pks).values_list('pk', flat=True))
+        removed = [pk for pk in pks if pk not in indexed]
+        if removed:
+            bulk_remove(model, removed, using=using)
+
+
+@shared_task
+def remove_from_search_index(model_label, pks):
+    """Remove the documents of deleted objects in bulk.
+    """
+    model = apps.get_model(model_label)
+    if SEARCH_BACKEND == 'postgres':
+        remove_documents(model, pks)
+        return
+    for using in connection_router.for_write():
+        if get_indexes(using, [model]):
+            bulk_remove(model, pks, using=using)
+
+
+@shared_task
+def delete_search_indexes(using, indexes):
+    """Delete indexes replaced by a rebuild unless they were put back
+    behind the alias in the meantime.
+    """
+    backend = connections[using].get_backend()
+    live = set(get_alias_indexes(backend.conn, backend.index_name))
+    for index in indexes:
+        if index not in live:
+            backend.conn.indices.delete(index=index, ignore=404)